@@ -175,8 +175,11 @@ export function useAgentWS(agentUrl: string) {
 
     ws.onmessage = (e) => {
       try {
-        const msg: ServerEvent = JSON.parse(e.data as string);
-        handleServerMessage(msg);
+        // The server batches frames sent in quick succession into an array
+        const parsed: ServerEvent | ServerEvent[] = JSON.parse(e.data as string);
+        for (const msg of Array.isArray(parsed) ? parsed : [parsed]) {
+          handleServerMessage(msg);
+        }
       } catch {
         // ignore parse errors
       }
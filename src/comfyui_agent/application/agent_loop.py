@@ -104,7 +104,12 @@ class AgentLoop:
         await self._emit(EventType.TURN_START, session_id)
 
         turn_start = time.time()
-        total_usage: dict[str, int] = {"input_tokens": 0, "output_tokens": 0}
+        total_usage: dict[str, int] = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+        }
         self._cancel_flags[session_id] = False
         iteration = -1
         recent_tools: list[str] = []  # Track recent tool names for loop detection
@@ -174,9 +179,16 @@ class AgentLoop:
                     system=system,
                 )
 
-                # Accumulate usage
+                # Accumulate usage. With prompt caching, input_tokens covers
+                # only the uncached part; fold the cache reads and writes back
+                # in so input_tokens keeps meaning the whole prompt
+                usage = response.usage
                 for k in total_usage:
-                    total_usage[k] += response.usage.get(k, 0)
+                    total_usage[k] += usage.get(k, 0)
+                total_usage["input_tokens"] += (
+                    usage.get("cache_read_input_tokens", 0)
+                    + usage.get("cache_creation_input_tokens", 0)
+                )
 
                 # Tool calls → execute and loop
                 if response.has_tool_calls():
@@ -99,7 +99,7 @@ class ContextSection:
     token_estimate: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class IdentityFeature:
     """A parsed RoleX identity feature file.
 
@@ -9,6 +9,7 @@ Four-layer event system inspired by AgentX:
 
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
@@ -60,8 +61,10 @@ class EventType(str, Enum):
     TURN_START = "turn.start"
     TURN_END = "turn.end"
 
-    # ComfyUI specific events
+    # ComfyUI specific events. The progress events are only forwarded to
+    # WebSocket clients; nothing in the agent subscribes to them
     COMFYUI_PROGRESS = "comfyui.progress"
+    COMFYUI_PROGRESS_BATCH = "comfyui.progress_batch"  # {frames: [progress data, ...]}
     COMFYUI_EXECUTING = "comfyui.executing"
     COMFYUI_EXECUTED = "comfyui.executed"
     COMFYUI_PREVIEW = "comfyui.preview"
@@ -75,7 +78,7 @@ class EventType(str, Enum):
     LLM_RETRY = "llm.retry"  # {attempt, max_retries, delay_ms, error}
 
     # Sub-agent events
-    SUBAGENT_START = "subagent.start"  # {task, child_session_id}
+    SUBAGENT_START = "subagent.start"  # {task}
     SUBAGENT_END = "subagent.end"  # {result_preview}
 
     # Context management events
@@ -95,10 +98,13 @@ class Event:
     data: dict[str, Any] = field(default_factory=dict)
     session_id: str = ""
     timestamp: float = 0.0
+    # type.value, read once here; Enum.value is a descriptor lookup and
+    # subscribers serialize the type of every event
+    type_str: str = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
+        self.type_str = self.type.value
         if self.timestamp == 0.0:
-            import time
             self.timestamp = time.time()
 
 
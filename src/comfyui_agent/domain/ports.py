@@ -63,6 +63,10 @@ class ComfyUIPort(Protocol):
         """Request ComfyUI restart via Manager's /manager/reboot endpoint."""
         ...
 
+    def invalidate_caches(self) -> None:
+        """Forget cached object_info / node listings so the next call refetches."""
+        ...
+
 
 class LLMPort(Protocol):
     """Interface for LLM communication."""
@@ -127,10 +131,19 @@ class WebPort(Protocol):
     the underlying HTTP client or search provider.
     """
 
-    async def fetch_url(self, url: str, timeout: int = 30) -> dict[str, Any]:
+    async def fetch_url(
+        self,
+        url: str,
+        timeout: int = 30,
+        extra_headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
         """Fetch content from a URL.
 
-        Returns dict with keys: content, content_type, status_code, url.
+        ``extra_headers`` lets callers send conditional-request headers
+        (If-None-Match / If-Modified-Since); a 304 comes back with empty content.
+
+        Returns dict with keys: content, content_type, status_code, url,
+        etag, last_modified, cache_control.
         """
         ...
 
@@ -141,9 +154,13 @@ class WebPort(Protocol):
         """
         ...
 
-    async def search_registry(self, node_id: str) -> dict[str, Any] | None:
+    async def search_registry(
+        self, node_id: str, fields: tuple[str, ...] = (),
+    ) -> dict[str, Any] | None:
         """Look up a custom node package on the Comfy Registry (api.comfy.org).
 
+        ``fields`` optionally asks the server to return only those top-level
+        keys; servers that ignore the projection return the full document.
         Returns node metadata dict or None if not found.
         """
         ...
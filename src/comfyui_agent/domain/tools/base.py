@@ -6,9 +6,14 @@ Inspired by OpenCode's BaseTool pattern.
 
 from __future__ import annotations
 
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Generic, Hashable, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
 
 
 @dataclass
@@ -85,3 +90,41 @@ def truncate_output(text: str, max_len: int = MAX_TOOL_OUTPUT) -> str:
     mid_lines = text[half:-half].count("\n")
     return f"{text[:half]}\n\n... [{mid_lines} lines truncated] ...\n\n{text[-half:]}"
 
+
+
+class TTLCache(Generic[_K, _V]):
+    """Small in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Used by tools that wrap idempotent network calls so repeated identical
+    requests within one agent session don't pay another round-trip.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 128) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[_K, tuple[float, _V]] = OrderedDict()
+
+    def get(self, key: _K) -> _V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: _K, value: _V, ttl: float | None = None) -> None:
+        """Store a value; ``ttl`` overrides the cache-wide default."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
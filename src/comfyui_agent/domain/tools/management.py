@@ -35,16 +35,63 @@ def _extract_filename_from_url(url: str) -> str:
     return ""
 
 
+# custom_nodes_dir -> ComfyUI venv interpreter. Only venvs that were found
+# are remembered, so one created or repaired later is still picked up.
+_venv_python: dict[Path, str] = {}
+
+
 def _find_comfyui_python(custom_nodes_dir: Path) -> str:
-    """Find the Python executable that ComfyUI uses."""
+    """Find the Python executable that ComfyUI uses.
+
+    A venv hit is cached per custom_nodes_dir — its layout doesn't change
+    between installs, so repeated installs skip the stat() probes.
+    """
+    python = _venv_python.get(custom_nodes_dir)
+    if python is not None:
+        return python
     comfyui_root = custom_nodes_dir.parent
     for venv_dir in [comfyui_root / ".venv", comfyui_root / "venv"]:
-        python = venv_dir / "bin" / "python"
-        if python.exists():
-            return str(python)
+        candidate = venv_dir / "bin" / "python"
+        if candidate.exists():
+            python = _venv_python[custom_nodes_dir] = str(candidate)
+            return python
     return "python3"
 
 
+_MAX_STDERR_BYTES = 2000  # only the tail of a failing command's stderr is useful
+
+
+def _decode_tail(data: bytes | None) -> str:
+    """Decode the last few KB of subprocess output.
+
+    Slicing the bytes first keeps a 10MB pip traceback from being decoded in
+    full just to show a short excerpt.
+    """
+    if not data:
+        return ""
+    return data[-_MAX_STDERR_BYTES:].decode(errors="replace")
+
+
+async def _communicate(
+    proc: asyncio.subprocess.Process, timeout: float
+) -> tuple[bytes, bytes]:
+    """Wait for a subprocess, making sure it never outlives the caller.
+
+    asyncio.wait_for only cancels communicate(), not the child itself — on
+    timeout or when the agent is cancelled the process is terminated, and
+    killed if it ignores SIGTERM.
+    """
+    try:
+        return await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+
+
 class UploadImageTool(Tool):
     """Upload an image to ComfyUI for use in workflows."""
 
@@ -344,11 +391,13 @@ class InstallCustomNodeTool(Tool):
 
         proc = await asyncio.create_subprocess_exec(
             "git", "clone", git_url, str(target_dir),
-            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
         )
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
+        _, stderr = await _communicate(proc, timeout=120)
         if proc.returncode != 0:
-            return ToolResult.error(f"git clone failed: {stderr.decode().strip()}")
+            return ToolResult.error(f"git clone failed: {_decode_tail(stderr).strip()}")
+        # The package is on disk now; don't let cached listings report it missing
+        self.client.invalidate_caches()
 
         req_file = target_dir / "requirements.txt"
         pip_msg = ""
@@ -356,13 +405,13 @@ class InstallCustomNodeTool(Tool):
             python_path = _find_comfyui_python(custom_nodes_dir)
             proc = await asyncio.create_subprocess_exec(
                 python_path, "-m", "pip", "install", "-r", str(req_file),
-                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
             )
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=300)
+            _, stderr = await _communicate(proc, timeout=300)
             if proc.returncode == 0:
                 pip_msg = "\nDependencies installed from requirements.txt"
             else:
-                pip_msg = f"\nWarning: pip install failed: {stderr.decode()[:200]}"
+                pip_msg = f"\nWarning: pip install failed: {_decode_tail(stderr)[:200]}"
 
         return ToolResult.success(
             f"Custom node '{repo_name}' installed at {target_dir}{pip_msg}\n"
@@ -457,6 +506,7 @@ class RefreshNodeIndexTool(Tool):
     async def run(self, params: dict[str, Any]) -> ToolResult:
         try:
             old_count = self.index.node_count
+            self.client.invalidate_caches()
             await self.index.build(self.client)
             new_count = self.index.node_count
             diff = new_count - old_count
@@ -13,6 +13,13 @@ from typing import Any
 from comfyui_agent.domain.ports import WebPort
 from comfyui_agent.domain.tools.base import Tool, ToolInfo, ToolResult
 
+# Only the keys rendered below — popular packages carry hundreds of versions
+# we never look at.
+_REGISTRY_FIELDS = (
+    "id", "name", "description", "downloads", "github_stars",
+    "repository", "license", "status", "latest_version", "tags",
+)
+
 
 class RegistrySearchTool(Tool):
     """Look up a custom node package on the Comfy Registry (api.comfy.org)."""
@@ -56,7 +63,7 @@ class RegistrySearchTool(Tool):
             return ToolResult.error("node_id parameter is required")
 
         try:
-            data = await self._web.search_registry(node_id)
+            data = await self._web.search_registry(node_id, fields=_REGISTRY_FIELDS)
         except Exception as e:
             return ToolResult.error(f"Registry lookup failed: {e}")
 
@@ -6,6 +6,7 @@ iteration budget, returning its findings as a tool result to the parent.
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any, TYPE_CHECKING
 
@@ -85,19 +86,29 @@ class SubAgentTool(Tool):
         from comfyui_agent.application.agent_loop import AgentLoop
         from comfyui_agent.domain.models.events import Event, EventType
 
-        # Create child session
-        # Use a dummy parent_id — the caller should provide session context
-        # but the tool doesn't have direct access to it. We use a fixed prefix.
-        child_session_id = await self._session_store.create_child_session(
-            parent_id="subagent", title=f"Sub-agent: {task[:50]}"
-        )
-
-        await self._event_bus.emit(Event(
-            type=EventType.SUBAGENT_START,
-            data={"task": task, "child_session_id": child_session_id},
-        ))
-
         try:
+            # Create child session and announce the start concurrently — the
+            # START event doesn't need the child session id, so the two awaits
+            # overlap instead of paying two round-trips back to back. Both are
+            # let finish before a failure is raised, so the except below never
+            # sends END ahead of START.
+            # Use a dummy parent_id — the caller should provide session context
+            # but the tool doesn't have direct access to it. We use a fixed prefix.
+            child_session_id, started = await asyncio.gather(
+                self._session_store.create_child_session(
+                    parent_id="subagent", title=f"Sub-agent: {task[:50]}"
+                ),
+                self._event_bus.emit(Event(
+                    type=EventType.SUBAGENT_START,
+                    data={"task": task},
+                )),
+                return_exceptions=True,
+            )
+            if isinstance(child_session_id, BaseException):
+                raise child_session_id
+            if isinstance(started, BaseException):
+                raise started
+
             # Use a separate event bus so sub-agent's internal events
             # (tool_executing, text_delta, etc.) don't leak to the frontend.
             # Only SUBAGENT_START/END are emitted on the main bus above.
@@ -6,17 +6,53 @@ Inspired by OpenCode's fetch tool, adapted for our async Tool ABC pattern.
 
 from __future__ import annotations
 
+import re
 from typing import Any
 
 from comfyui_agent.domain.ports import WebPort
-from comfyui_agent.domain.tools.base import Tool, ToolInfo, ToolResult, truncate_output
+from comfyui_agent.domain.tools.base import (
+    MAX_TOOL_OUTPUT,
+    Tool,
+    ToolInfo,
+    ToolResult,
+    TTLCache,
+    truncate_output,
+)
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+_VALIDATOR_TTL = 24 * 3600.0  # how long ETag/Last-Modified are kept for revalidation
+
+
+def _freshness(cache_control: str, default: float) -> float:
+    """Seconds a response may be served from cache without revalidation."""
+    directives = cache_control.lower()
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    match = _MAX_AGE_RE.search(directives)
+    if match:
+        return float(match.group(1))
+    return default
 
 
 class WebFetchTool(Tool):
-    """Fetch content from a URL and return extracted text."""
+    """Fetch content from a URL and return extracted text.
 
-    def __init__(self, web: WebPort) -> None:
+    Successful fetches are cached per URL — for ``cache_ttl`` seconds, or
+    for the server's ``Cache-Control: max-age`` when one is sent. After that,
+    a response that carried an ETag or Last-Modified is revalidated with a
+    conditional request, and a 304 reuses the cached text.
+    """
+
+    def __init__(
+        self, web: WebPort, cache_ttl: float = 300.0, cache_size: int = 64,
+    ) -> None:
         self._web = web
+        self._cache: TTLCache[str, ToolResult] = TTLCache(
+            ttl=cache_ttl, maxsize=cache_size,
+        )
+        self._cond_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+            ttl=_VALIDATOR_TTL, maxsize=cache_size,
+        )
 
     def info(self) -> ToolInfo:
         return ToolInfo(
@@ -61,17 +97,60 @@ class WebFetchTool(Tool):
 
         timeout = min(params.get("timeout", 30), 120)
 
+        cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+
+        validators = self._cond_cache.get(url)
         try:
-            result = await self._web.fetch_url(url, timeout=timeout)
+            if validators is not None:
+                result = await self._web.fetch_url(
+                    url, timeout=timeout, extra_headers=validators["headers"],
+                )
+            else:
+                result = await self._web.fetch_url(url, timeout=timeout)
         except Exception as e:
             return ToolResult.error(f"Failed to fetch URL: {e}")
 
         status = result.get("status_code", 0)
+        if status == 304 and validators is not None:
+            tool_result: ToolResult = validators["result"]
+            cache_control = result.get("cache_control") or validators["cache_control"]
+            self._cache.set(url, tool_result, ttl=_freshness(cache_control, self._cache.ttl))
+            return tool_result
         if status != 200:
             return ToolResult.error(f"HTTP {status} for {url}")
 
         content = result.get("content", "")
         content_type = result.get("content_type", "")
 
-        output = f"URL: {url}\nContent-Type: {content_type}\n\n{content}"
-        return ToolResult.success(truncate_output(output))
+        # Truncate the body alone so a multi-MB page isn't copied into one
+        # more full-size string just to be cut down again.
+        header = f"URL: {url}\nContent-Type: {content_type}\n\n"
+        body = truncate_output(content, max(MAX_TOOL_OUTPUT - len(header), 0))
+        tool_result = ToolResult.success("".join((header, body)))
+        self._remember(url, result, tool_result)
+        return tool_result
+
+    def _remember(
+        self, url: str, response: dict[str, Any], tool_result: ToolResult,
+    ) -> None:
+        """Cache a fetched result and keep its validators for revalidation."""
+        cache_control = response.get("cache_control") or ""
+        if "no-store" in cache_control.lower():
+            return
+        ttl = _freshness(cache_control, self._cache.ttl)
+        if ttl > 0:
+            self._cache.set(url, tool_result, ttl=ttl)
+
+        headers: dict[str, str] = {}
+        if response.get("etag"):
+            headers["If-None-Match"] = response["etag"]
+        if response.get("last_modified"):
+            headers["If-Modified-Since"] = response["last_modified"]
+        if headers:
+            self._cond_cache.set(url, {
+                "headers": headers,
+                "result": tool_result,
+                "cache_control": cache_control,
+            })
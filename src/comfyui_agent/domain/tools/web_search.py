@@ -9,14 +9,23 @@ from __future__ import annotations
 from typing import Any
 
 from comfyui_agent.domain.ports import WebPort
-from comfyui_agent.domain.tools.base import Tool, ToolInfo, ToolResult
+from comfyui_agent.domain.tools.base import Tool, ToolInfo, ToolResult, TTLCache
 
 
 class WebSearchTool(Tool):
-    """Search the web and return summarized results."""
+    """Search the web and return summarized results.
 
-    def __init__(self, web: WebPort) -> None:
+    Formatted results are cached per (query, max_results) for ``cache_ttl``
+    seconds — agents often repeat the same search across iterations.
+    """
+
+    def __init__(
+        self, web: WebPort, cache_ttl: float = 600.0, cache_size: int = 128,
+    ) -> None:
         self._web = web
+        self._cache: TTLCache[tuple[str, int], ToolResult] = TTLCache(
+            ttl=cache_ttl, maxsize=cache_size,
+        )
 
     def info(self) -> ToolInfo:
         return ToolInfo(
@@ -61,13 +70,20 @@ class WebSearchTool(Tool):
 
         max_results = min(params.get("max_results", 5), 10)
 
+        key = (query, max_results)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             results = await self._web.search(query, max_results=max_results)
         except Exception as e:
             return ToolResult.error(f"Search failed: {e}")
 
         if not results:
-            return ToolResult.success("No results found.")
+            result = ToolResult.success("No results found.")
+            self._cache.set(key, result)
+            return result
 
         lines: list[str] = [f"Search results for: {query}\n"]
         for i, r in enumerate(results, 1):
@@ -80,4 +96,6 @@ class WebSearchTool(Tool):
                 lines.append(f"   {snippet}")
             lines.append("")
 
-        return ToolResult.success("\n".join(lines))
+        result = ToolResult.success("\n".join(lines))
+        self._cache.set(key, result)
+        return result
@@ -6,6 +6,7 @@ Independent process communication with ComfyUI via its native API.
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import logging
 import uuid
@@ -14,10 +15,62 @@ from typing import Any, AsyncIterator
 import aiohttp
 
 from comfyui_agent.domain.models.events import Event, EventType
+from comfyui_agent.domain.tools.base import TTLCache
 from comfyui_agent.infrastructure.event_bus import EventBus
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    _JSONDecodeError: type[ValueError] = orjson.JSONDecodeError
+
+    def _json_dumps(obj: Any) -> str:
+        # aiohttp's json_serialize must return str
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+    _JSONDecodeError = json.JSONDecodeError
+
 logger = logging.getLogger(__name__)
 
+# Max WebSocket frames drained from the receive queue per dispatch round.
+_WS_BATCH_MAX = 32
+# Frames the reader may get ahead of dispatch before it stops reading the
+# socket, so a slow event-bus subscriber pushes back on ComfyUI instead of
+# growing the queue without limit.
+_WS_QUEUE_MAX = 4 * _WS_BATCH_MAX
+# Seconds between client pings, and the largest frame (preview image) accepted.
+_WS_HEARTBEAT = 20.0
+_WS_MAX_MSG_SIZE = 16 * 1024 * 1024
+
+# Per-request timeouts for Manager endpoints, built once. Manager model
+# downloads can take a very long time for large models (30 minutes).
+_TIMEOUT_PROBE = aiohttp.ClientTimeout(total=5)
+_TIMEOUT_NODE_LIST = aiohttp.ClientTimeout(total=30)
+_TIMEOUT_NODE_INSTALL = aiohttp.ClientTimeout(total=600)
+_TIMEOUT_MODEL_INSTALL = aiohttp.ClientTimeout(total=1800)
+
+# wait_for_prompt() history polling bounds when no WebSocket is connected.
+_POLL_INITIAL_DELAY = 0.25
+_POLL_MAX_DELAY = 5.0
+
+# How long a manager_available() answer is reused (seconds).
+_MANAGER_PROBE_TTL = 600.0
+_MANAGER_PROBE_NEGATIVE_TTL = 30.0
+
+# ComfyUI WebSocket message type → event emitted on the bus.
+_EVENT_MAP: dict[str, EventType] = {
+    "progress": EventType.COMFYUI_PROGRESS,
+    "executing": EventType.COMFYUI_EXECUTING,
+    "executed": EventType.COMFYUI_EXECUTED,
+    "execution_error": EventType.COMFYUI_ERROR,
+    "status": EventType.COMFYUI_QUEUE_UPDATE,
+}
+
 
 class ComfyUIClient:
     """Client for communicating with ComfyUI's HTTP and WebSocket API."""
@@ -28,19 +81,52 @@ class ComfyUIClient:
         ws_url: str = "ws://127.0.0.1:6006/ws",
         timeout: int = 30,
         event_bus: EventBus | None = None,
+        connection_limit: int = 64,
+        connection_limit_per_host: int = 32,
+        keepalive_timeout: float = 75.0,
+        dns_cache_ttl: int = 300,
+        listing_cache_ttl: float = 60.0,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.ws_url = ws_url.rstrip("/")
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.client_id = str(uuid.uuid4())
         self.event_bus = event_bus
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
         self._session: aiohttp.ClientSession | None = None
         self._ws: aiohttp.ClientWebSocketResponse | None = None
         self._ws_task: asyncio.Task[None] | None = None
+        # prompt_id → future resolved by the WS listener when the prompt ends
+        self._pending: dict[str, asyncio.Future[None]] = {}
+        self._manager_available: bool | None = None
+        self._manager_probe_expires = 0.0
+        # Large, slow-changing listings (object_info, Manager node list).
+        # Entries are shared between callers and must not be mutated; empty
+        # results (unknown node class) are cached as well.
+        self._listing_cache: TTLCache[tuple[str, str | None], dict[str, Any]] = TTLCache(
+            ttl=listing_cache_ttl, maxsize=32,
+        )
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            # Keep-alive pool + DNS cache so repeated API/Manager calls reuse
+            # warm connections. The connector is owned by (and closed with)
+            # the session, so it is rebuilt whenever the session is.
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                raise_for_status=False,
+                json_serialize=_json_dumps,
+            )
         return self._session
 
     # ============================================================
@@ -52,23 +138,26 @@ class ComfyUIClient:
         url = f"{self.base_url}{path}"
         async with session.get(url, **kwargs) as resp:
             resp.raise_for_status()
-            return await resp.json()
+            return await resp.json(loads=_json_loads)
 
     async def _post(self, path: str, data: Any = None, **kwargs: Any) -> Any:
         session = await self._get_session()
         url = f"{self.base_url}{path}"
         async with session.post(url, json=data, **kwargs) as resp:
             resp.raise_for_status()
-            content_type = resp.content_type or ""
-            if "json" in content_type:
-                return await resp.json()
-            text = await resp.text()
-            if text.strip():
-                try:
-                    return json.loads(text)
-                except json.JSONDecodeError:
-                    return {"status": "ok", "raw": text}
+            # application/json or a +json subtype; content_type is already
+            # parsed (and lower-cased) by aiohttp.
+            if resp.content_type.endswith("json"):
+                return await resp.json(loads=_json_loads)
+            body = await resp.read()
+        if not body or body.isspace():
             return {"status": "ok"}
+        # Some endpoints answer JSON with a text/* type; parse the raw bytes
+        # directly rather than decoding to str first.
+        try:
+            return _json_loads(body)
+        except _JSONDecodeError:
+            return {"status": "ok", "raw": body.decode("utf-8", errors="replace")}
 
     async def get_system_stats(self) -> dict[str, Any]:
         """Get system statistics (VRAM, version, etc.)."""
@@ -76,9 +165,16 @@ class ComfyUIClient:
 
     async def get_object_info(self, node_class: str | None = None) -> dict[str, Any]:
         """Get node definitions. If node_class is given, get info for that node only."""
+        key = ("object_info", node_class or None)
+        cached = self._listing_cache.get(key)
+        if cached is not None:
+            return cached
         if node_class:
-            return await self._get(f"/api/object_info/{node_class}")
-        return await self._get("/api/object_info")
+            info = await self._get(f"/api/object_info/{node_class}")
+        else:
+            info = await self._get("/api/object_info")
+        self._listing_cache.set(key, info)
+        return info
 
     async def get_queue(self) -> dict[str, Any]:
         """Get current queue status (running and pending)."""
@@ -138,11 +234,11 @@ class ComfyUIClient:
         form.add_field("image", image_data, filename=filename, content_type="image/png")
         if subfolder:
             form.add_field("subfolder", subfolder)
-        form.add_field("overwrite", str(overwrite).lower())
+        form.add_field("overwrite", "true" if overwrite else "false")
 
         async with session.post(f"{self.base_url}/api/upload/image", data=form) as resp:
             resp.raise_for_status()
-            return await resp.json()
+            return await resp.json(loads=_json_loads)
 
     async def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
         """Download an image from ComfyUI."""
@@ -173,14 +269,27 @@ class ComfyUIClient:
     # ============================================================
 
     async def manager_available(self) -> bool:
-        """Check if ComfyUI Manager is installed by probing its endpoint."""
+        """Check if ComfyUI Manager is installed by probing its endpoint.
+
+        The answer rarely changes within a session, so it is cached: for
+        10 minutes when Manager is present, briefly when it is not (ComfyUI
+        may simply still be starting).
+        """
+        now = asyncio.get_running_loop().time()
+        if self._manager_available is not None and now < self._manager_probe_expires:
+            return self._manager_available
         try:
             session = await self._get_session()
             url = f"{self.base_url}/manager/show_menu"
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                return resp.status in (200, 201)
+            async with session.get(url, timeout=_TIMEOUT_PROBE) as resp:
+                available = resp.status in (200, 201)
         except Exception:
-            return False
+            available = False
+        self._manager_available = available
+        self._manager_probe_expires = now + (
+            _MANAGER_PROBE_TTL if available else _MANAGER_PROBE_NEGATIVE_TTL
+        )
+        return available
 
     async def manager_install_model(
         self,
@@ -203,20 +312,16 @@ class ComfyUIClient:
             "type": model_type,
             "save_path": save_path,
         }
-        # Manager downloads can take a very long time for large models.
-        # Use a generous timeout (30 minutes).
-        long_timeout = aiohttp.ClientTimeout(total=1800)
         api_url = f"{self.base_url}/model/install"
-        async with session.post(api_url, json=data, timeout=long_timeout) as resp:
+        async with session.post(api_url, json=data, timeout=_TIMEOUT_MODEL_INSTALL) as resp:
             if resp.status == 403:
                 raise PermissionError(
                     "Manager security level too high. "
                     "Set security_level to 'middle' or lower in Manager config."
                 )
             resp.raise_for_status()
-            content_type = resp.content_type or ""
-            if "json" in content_type:
-                return await resp.json()
+            if resp.content_type.endswith("json"):
+                return await resp.json(loads=_json_loads)
             return {"status": "ok"}
 
     async def manager_install_node(
@@ -235,9 +340,8 @@ class ComfyUIClient:
             "channel": channel,
             "mode": mode,
         }
-        long_timeout = aiohttp.ClientTimeout(total=600)
         api_url = f"{self.base_url}/customnode/install"
-        async with session.post(api_url, json=data, timeout=long_timeout) as resp:
+        async with session.post(api_url, json=data, timeout=_TIMEOUT_NODE_INSTALL) as resp:
             if resp.status == 403:
                 raise PermissionError(
                     "Manager security level too high for node installation."
@@ -246,29 +350,41 @@ class ComfyUIClient:
                 text = await resp.text()
                 raise RuntimeError(f"Manager install failed: {text}")
             resp.raise_for_status()
+            self.invalidate_caches()
             return {"status": "ok", "message": await resp.text()}
 
     async def manager_get_node_list(self, mode: str = "default") -> dict[str, Any]:
         """Get available custom nodes from Manager."""
+        key = ("node_list", mode)
+        cached = self._listing_cache.get(key)
+        if cached is not None:
+            return cached
         session = await self._get_session()
         api_url = f"{self.base_url}/customnode/getlist"
         params = {"mode": mode, "skip_update": "true"}
-        long_timeout = aiohttp.ClientTimeout(total=30)
-        async with session.get(api_url, params=params, timeout=long_timeout) as resp:
+        async with session.get(api_url, params=params, timeout=_TIMEOUT_NODE_LIST) as resp:
             resp.raise_for_status()
-            return await resp.json()
+            node_list = await resp.json(loads=_json_loads)
+        self._listing_cache.set(key, node_list)
+        return node_list  # type: ignore[no-any-return]
+
+    def invalidate_caches(self) -> None:
+        """Drop cached node listings, e.g. after installing custom nodes."""
+        self._listing_cache.clear()
 
     async def manager_reboot(self) -> None:
         """Request ComfyUI restart via Manager."""
         session = await self._get_session()
         api_url = f"{self.base_url}/manager/reboot"
         try:
-            async with session.get(api_url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            async with session.get(api_url, timeout=_TIMEOUT_PROBE) as resp:
                 if resp.status == 403:
                     raise PermissionError("Manager security level too high for reboot.")
         except aiohttp.ClientConnectionError:
             # Expected — ComfyUI exits immediately on reboot
             pass
+        self.invalidate_caches()
+        self._manager_available = None
         logger.info("ComfyUI reboot requested via Manager")
 
     # ============================================================
@@ -279,7 +395,14 @@ class ComfyUIClient:
         """Connect to ComfyUI WebSocket for real-time events."""
         session = await self._get_session()
         url = f"{self.ws_url}?clientId={self.client_id}"
-        self._ws = await session.ws_connect(url)
+        # Previews are already-compressed images, so permessage-deflate only
+        # costs CPU; the heartbeat notices a dead server between prompts.
+        self._ws = await session.ws_connect(
+            url,
+            compress=0,
+            heartbeat=_WS_HEARTBEAT,
+            max_msg_size=_WS_MAX_MSG_SIZE,
+        )
         self._ws_task = asyncio.create_task(self._ws_listener())
         logger.info("WebSocket connected to %s", url)
 
@@ -287,6 +410,8 @@ class ComfyUIClient:
         """Disconnect WebSocket."""
         if self._ws_task:
             self._ws_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._ws_task
             self._ws_task = None
         if self._ws and not self._ws.closed:
             await self._ws.close()
@@ -294,68 +419,197 @@ class ComfyUIClient:
         logger.info("WebSocket disconnected")
 
     async def _ws_listener(self) -> None:
-        """Background task that listens to WebSocket messages and emits events."""
+        """Background task that listens to WebSocket messages and emits events.
+
+        A pump task moves frames into a queue; this loop drains whatever is
+        already queued (up to _WS_BATCH_MAX) and dispatches it in one round,
+        so bursts of progress frames cost one emit instead of one per frame.
+        """
         if not self._ws:
             return
 
+        frames: asyncio.Queue[aiohttp.WSMessage | None] = asyncio.Queue(_WS_QUEUE_MAX)
+        pump = asyncio.create_task(self._ws_pump(self._ws, frames))
         try:
-            async for msg in self._ws:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    await self._handle_ws_message(json.loads(msg.data))
-                elif msg.type == aiohttp.WSMsgType.BINARY:
-                    # Binary messages are preview images
-                    if self.event_bus:
-                        await self.event_bus.emit(Event(
-                            type=EventType.COMFYUI_PREVIEW,
-                            data={"image_data": msg.data},
-                        ))
-                elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
-                    break
+            closed = False
+            while not closed:
+                batch: list[aiohttp.WSMessage] = []
+                item = await frames.get()
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= _WS_BATCH_MAX or frames.empty():
+                        break
+                    item = frames.get_nowait()
+                closed = item is None
+                if batch:
+                    await self._handle_ws_frames(batch)
         except asyncio.CancelledError:
             pass
         except Exception:
             logger.exception("WebSocket listener error")
+        finally:
+            pump.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await pump
+            # Wake any waiters so they fall back to polling history.
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_result(None)
+
+    @staticmethod
+    async def _ws_pump(
+        ws: aiohttp.ClientWebSocketResponse,
+        frames: asyncio.Queue[aiohttp.WSMessage | None],
+    ) -> None:
+        """Read frames off the socket; a trailing None marks the end."""
+        try:
+            async for msg in ws:
+                if msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                    break
+                await frames.put(msg)
+        except Exception:
+            logger.exception("WebSocket read error")
+        # Not reached when cancelled: the listener has stopped reading then
+        await frames.put(None)
+
+    async def _handle_ws_frames(self, batch: list[aiohttp.WSMessage]) -> None:
+        """Dispatch a batch of raw frames, preserving their order."""
+        messages: list[dict[str, Any]] = []
+        for msg in batch:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                messages.append(_json_loads(msg.data))
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                # Binary messages are preview images
+                await self._handle_ws_batch(messages)
+                messages = []
+                if self.event_bus:
+                    await self.event_bus.emit(Event(
+                        type=EventType.COMFYUI_PREVIEW,
+                        data={"image_data": msg.data},
+                    ))
+        await self._handle_ws_batch(messages)
+
+    async def _handle_ws_batch(self, messages: list[dict[str, Any]]) -> None:
+        """Process decoded messages, coalescing consecutive progress frames.
+
+        A run of two or more ``progress`` frames becomes one
+        COMFYUI_PROGRESS_BATCH event; everything else (including errors) is
+        emitted individually via _handle_ws_message. Like COMFYUI_PROGRESS,
+        the batch has no subscriber in the agent itself: the web server
+        forwards it to chat WebSockets for clients that render progress, and
+        the plugin UI ignores event types it doesn't handle.
+        """
+        progress: list[dict[str, Any]] = []
+        for message in messages:
+            if message.get("type") == "progress":
+                progress.append(message)
+                continue
+            if progress:
+                await self._emit_progress(progress)
+                progress = []
+            await self._handle_ws_message(message)
+        if progress:
+            await self._emit_progress(progress)
+
+    async def _emit_progress(self, progress: list[dict[str, Any]]) -> None:
+        if len(progress) == 1:
+            await self._handle_ws_message(progress[0])
+        elif self.event_bus:
+            await self.event_bus.emit(Event(
+                type=EventType.COMFYUI_PROGRESS_BATCH,
+                data={"frames": [m.get("data", {}) for m in progress]},
+            ))
 
     async def _handle_ws_message(self, message: dict[str, Any]) -> None:
         """Process a WebSocket message and emit corresponding event."""
-        if not self.event_bus:
-            return
-
         msg_type = message.get("type", "")
         data = message.get("data", {})
 
-        event_map: dict[str, EventType] = {
-            "progress": EventType.COMFYUI_PROGRESS,
-            "executing": EventType.COMFYUI_EXECUTING,
-            "executed": EventType.COMFYUI_EXECUTED,
-            "execution_error": EventType.COMFYUI_ERROR,
-            "status": EventType.COMFYUI_QUEUE_UPDATE,
-        }
+        if self._pending:
+            self._resolve_pending(msg_type, data)
 
-        event_type = event_map.get(msg_type)
+        if not self.event_bus:
+            return
+
+        event_type = _EVENT_MAP.get(msg_type)
         if event_type:
             await self.event_bus.emit(Event(type=event_type, data=data))
 
+    def _resolve_pending(self, msg_type: str, data: dict[str, Any]) -> None:
+        """Wake wait_for_prompt() when a prompt finishes or fails."""
+        future = self._pending.get(data.get("prompt_id", ""))
+        if future is None or future.done():
+            return
+        if msg_type == "execution_error":
+            future.set_exception(RuntimeError(
+                f"Prompt {data.get('prompt_id')} failed: "
+                f"{data.get('exception_message', data)}"
+            ))
+        elif msg_type == "execution_success" or (
+            msg_type == "executing" and data.get("node") is None
+        ):
+            future.set_result(None)
+
+    async def _completed_history(self, prompt_id: str) -> dict[str, Any] | None:
+        """Return the prompt's history entry if it has finished, else None."""
+        history = await self.get_history(prompt_id)
+        if prompt_id in history:
+            prompt_history = history[prompt_id]
+            status = prompt_history.get("status", {})
+            if status.get("completed", False) or "outputs" in prompt_history:
+                return prompt_history
+            if status.get("status_str") == "error":
+                raise RuntimeError(
+                    f"Prompt {prompt_id} failed: {status.get('messages', [])}"
+                )
+        return None
+
     async def wait_for_prompt(self, prompt_id: str, timeout: float = 300.0) -> dict[str, Any]:
         """Wait for a prompt to complete execution.
 
-        Polls history until the prompt appears in completed state.
-        If WebSocket is connected, also listens for real-time events.
+        When the WebSocket is connected, waits for the listener to report the
+        prompt finished and then reads its history once. Without a WebSocket
+        (or if it drops mid-wait) falls back to polling history with
+        exponential backoff.
         """
-        deadline = asyncio.get_event_loop().time() + timeout
-
-        while asyncio.get_event_loop().time() < deadline:
-            history = await self.get_history(prompt_id)
-            if prompt_id in history:
-                prompt_history = history[prompt_id]
-                status = prompt_history.get("status", {})
-                if status.get("completed", False) or "outputs" in prompt_history:
-                    return prompt_history
-                if status.get("status_str") == "error":
-                    raise RuntimeError(
-                        f"Prompt {prompt_id} failed: {status.get('messages', [])}"
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+
+        future: asyncio.Future[None] | None = None
+        if self._ws is not None and not self._ws.closed:
+            future = self._pending.setdefault(prompt_id, loop.create_future())
+
+        try:
+            # Registered before this check, so a prompt that finishes in
+            # between is caught by one of the two.
+            entry = await self._completed_history(prompt_id)
+            if entry is not None:
+                return entry
+
+            if future is not None:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(future), max(deadline - loop.time(), 0)
                     )
-            await asyncio.sleep(1.0)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"Prompt {prompt_id} did not complete within {timeout}s"
+                    ) from None
+                entry = await self._completed_history(prompt_id)
+                if entry is not None:
+                    return entry
+
+            # Back off from 0.25s to 5s: quick prompts are still picked up
+            # promptly while long generations cost far fewer history fetches.
+            delay = _POLL_INITIAL_DELAY
+            while (remaining := deadline - loop.time()) > 0:
+                await asyncio.sleep(min(delay, remaining))
+                entry = await self._completed_history(prompt_id)
+                if entry is not None:
+                    return entry
+                delay = min(delay * 1.5, _POLL_MAX_DELAY)
+        finally:
+            self._pending.pop(prompt_id, None)
 
         raise TimeoutError(f"Prompt {prompt_id} did not complete within {timeout}s")
 
@@ -371,6 +625,21 @@ class ComfyUIClient:
         except Exception:
             return False
 
+    async def warmup(self) -> bool:
+        """Health check that also prewarms the connection pool.
+
+        Probes system stats, the Manager and folder paths concurrently so
+        the first tool call that needs them finds warm keep-alive
+        connections. Returns whether ComfyUI is reachable.
+        """
+        stats, _, _ = await asyncio.gather(
+            self.get_system_stats(),
+            self.manager_available(),
+            self.get_folder_paths(),
+            return_exceptions=True,
+        )
+        return not isinstance(stats, BaseException)
+
     async def close(self) -> None:
         """Close all connections."""
         await self.disconnect_ws()
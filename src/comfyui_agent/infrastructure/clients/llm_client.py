@@ -7,27 +7,76 @@ Includes retry logic with exponential backoff for transient errors.
 from __future__ import annotations
 
 import asyncio
+import importlib.util
 import logging
 import random
 from dataclasses import dataclass, field
-from typing import Any, AsyncIterator
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
 
 import anthropic
 
+if TYPE_CHECKING:
+    import httpx
+
 from comfyui_agent.domain.models.events import Event, EventType
 from comfyui_agent.infrastructure.event_bus import EventBus
 
 logger = logging.getLogger(__name__)
 
+_random = random.random
+
+# HTTP/2 needs the optional h2 package (httpx[http2]).
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_shared_http_client: httpx.AsyncClient | None = None
+
+
+def build_shared_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client for Anthropic API calls.
+
+    LLMClients given this client share one keep-alive pool (multiplexed over
+    HTTP/2 when h2 is installed) instead of each opening their own. Close it
+    with close_shared_http_client() at shutdown.
+    """
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        # Build Limits from the SDK's own default so it matches whichever
+        # httpx module this anthropic release is built on.
+        limits_cls = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+        _shared_http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=limits_cls(
+                max_connections=64,
+                max_keepalive_connections=32,
+                keepalive_expiry=60,
+            ),
+            http2=_HTTP2,
+        )
+    return _shared_http_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the client returned by build_shared_http_client(), if any."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
 
-@dataclass
+# Buffered text deltas are flushed early once they reach this many characters.
+_STREAM_FLUSH_CHARS = 256
+# Distinct tool lists / system prompts whose request payloads are memoized.
+_PAYLOAD_CACHE_SIZE = 8
+# Prompt-cache breakpoint attached to the last tool and the system prompt.
+_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+@dataclass(slots=True)
 class ToolCall:
     id: str
     name: str
     input: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Response from the LLM."""
     text: str = ""
@@ -39,12 +88,48 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
-@dataclass
+@dataclass(slots=True)
+class _StreamState:
+    """Per-call streaming state.
+
+    ``text`` collects every delta for the final response; ``parts`` holds the
+    deltas not yet emitted, so they reach the event bus in fewer events.
+    ``timer`` flushes ``parts`` if the stream stalls; ``lock`` keeps timer and
+    inline flushes in order.
+    """
+    text: list[str] = field(default_factory=list)
+    parts: list[str] = field(default_factory=list)
+    size: int = 0
+    started: float = 0.0
+    timer: asyncio.TimerHandle | None = None
+    flush_task: asyncio.Task[None] | None = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def _log_flush_error(task: asyncio.Task[None]) -> None:
+    """Done callback for timer flushes, which nothing awaits."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Text delta flush failed", exc_info=task.exception())
+
+
+_StreamHandler = Callable[[Any, "LLMResponse", _StreamState], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class ToolSchema:
     """Tool definition for the LLM."""
     name: str
     description: str
     input_schema: dict[str, Any]
+    rendered: dict[str, Any] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # API payload form, built once since schemas never change after startup
+        object.__setattr__(self, "rendered", {
+            "name": self.name,
+            "description": self.description,
+            "input_schema": self.input_schema,
+        })
 
 
 class LLMClient:
@@ -61,11 +146,18 @@ class LLMClient:
         max_retries: int = 5,
         retry_base_delay_ms: int = 2000,
         retry_max_delay_ms: int = 60000,
+        stream_coalesce_ms: int = 20,
+        http_client: httpx.AsyncClient | None = None,
+        prompt_caching: bool = True,
     ) -> None:
         client_kwargs: dict[str, Any] = {"api_key": api_key}
         if base_url:
             client_kwargs["base_url"] = base_url
+        if http_client is not None:
+            client_kwargs["http_client"] = http_client
         self.client = anthropic.AsyncAnthropic(**client_kwargs)
+        # A caller-supplied (possibly shared) http_client is closed by its owner
+        self._owns_http_client = http_client is None
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
@@ -73,6 +165,19 @@ class LLMClient:
         self.max_retries = max_retries
         self.retry_base_delay_ms = retry_base_delay_ms
         self.retry_max_delay_ms = retry_max_delay_ms
+        # 0 disables coalescing: one STREAM_TEXT_DELTA per SDK TextEvent
+        self.stream_coalesce_ms = stream_coalesce_ms
+        # Mark the tools and system prompt as cache breakpoints so the stable
+        # prefix of each agent-loop request is served from the prompt cache
+        self.prompt_caching = prompt_caching
+        self._stream_dispatch = self._build_stream_dispatch()
+        self._text_event_cls = getattr(anthropic, "TextEvent", None)
+        # Request payload pieces, reused across calls; the SDK only reads them.
+        # Keyed by id(tools) with the list kept alive so the id can't be reused.
+        # Keyed on the schemas themselves (frozen, hashed by identity), so a
+        # list edited in place, even at the same length, misses the cache
+        self._tools_cache: dict[tuple[ToolSchema, ...], list[dict[str, Any]]] = {}
+        self._system_cache: dict[str, list[dict[str, Any]]] = {}
 
     async def chat(
         self,
@@ -89,16 +194,9 @@ class LLMClient:
             "messages": messages,
         }
         if system:
-            kwargs["system"] = [{"type": "text", "text": system}]
+            kwargs["system"] = self._system_payload(system)
         if tools:
-            kwargs["tools"] = [
-                {
-                    "name": t.name,
-                    "description": t.description,
-                    "input_schema": t.input_schema,
-                }
-                for t in tools
-            ]
+            kwargs["tools"] = self._tools_payload(tools)
 
         last_error: Exception | None = None
         for attempt in range(1, self.max_retries + 1):
@@ -127,36 +225,81 @@ class LLMClient:
 
         raise last_error  # type: ignore[misc]
 
+    def _system_payload(self, system: str) -> list[dict[str, Any]]:
+        payload = self._system_cache.get(system)
+        if payload is None:
+            if len(self._system_cache) >= _PAYLOAD_CACHE_SIZE:
+                del self._system_cache[next(iter(self._system_cache))]
+            block: dict[str, Any] = {"type": "text", "text": system}
+            if self.prompt_caching:
+                block["cache_control"] = _CACHE_CONTROL
+            payload = self._system_cache[system] = [block]
+        return payload
+
+    def _tools_payload(self, tools: list[ToolSchema]) -> list[dict[str, Any]]:
+        key = tuple(tools)
+        cached = self._tools_cache.get(key)
+        if cached is not None:
+            return cached
+        payload = [t.rendered for t in tools]
+        if self.prompt_caching and payload:
+            # Copy: rendered dicts are shared by every client using the schema
+            payload[-1] = {**payload[-1], "cache_control": _CACHE_CONTROL}
+        if len(self._tools_cache) >= _PAYLOAD_CACHE_SIZE:
+            del self._tools_cache[next(iter(self._tools_cache))]
+        self._tools_cache[key] = payload
+        return payload
+
     def _calc_delay(self, attempt: int, error: Exception) -> int:
         """Calculate retry delay with exponential backoff + jitter."""
         # Respect Retry-After header if present
-        if hasattr(error, "response") and error.response is not None:
-            retry_after = error.response.headers.get("retry-after")
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
             if retry_after:
                 try:
                     return int(float(retry_after) * 1000)
                 except (ValueError, TypeError):
                     pass
 
-        base = self.retry_base_delay_ms * (2 ** (attempt - 1))
-        jitter = random.uniform(0.8, 1.2)
+        base = self.retry_base_delay_ms << (attempt - 1)
+        jitter = 0.8 + _random() * 0.4  # uniform in [0.8, 1.2)
         return min(int(base * jitter), self.retry_max_delay_ms)
 
     async def _do_chat(self, kwargs: dict[str, Any]) -> LLMResponse:
         """Core chat logic — single attempt, no retry."""
         response = LLMResponse()
-
-        async with self.client.messages.stream(**kwargs) as stream:
-            async for event in stream:
-                await self._handle_stream_event(event, response)
-
-            # get_final_message() must be called inside the async with block
-            final = await stream.get_final_message()
-
+        state = _StreamState()
+        # Without a bus there is nothing to emit; only the text is needed.
+        handle = self._handle_stream_event if self.event_bus else self._collect_text
+
+        try:
+            async with self.client.messages.stream(**kwargs) as stream:
+                async for event in stream:
+                    await handle(event, response, state)
+                await self._flush_text_deltas(state)
+
+                # get_final_message() must be called inside the async with block
+                final = await stream.get_final_message()
+        finally:
+            # A failed attempt must not emit its leftover text after a retry,
+            # neither from the idle timer nor from a flush it already started
+            state.parts.clear()
+            if state.timer is not None:
+                state.timer.cancel()
+            if state.flush_task is not None:
+                state.flush_task.cancel()
+
+        response.text = "".join(state.text)
         response.stop_reason = final.stop_reason or ""
+        usage = final.usage
         response.usage = {
-            "input_tokens": final.usage.input_tokens,
-            "output_tokens": final.usage.output_tokens,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "cache_creation_input_tokens": (
+                getattr(usage, "cache_creation_input_tokens", None) or 0
+            ),
         }
 
         # Extract tool calls from the final message content blocks
@@ -176,41 +319,130 @@ class LLMClient:
         )
         return response
 
-    async def _handle_stream_event(self, event: Any, response: LLMResponse) -> None:
+    def _build_stream_dispatch(self) -> dict[type, _StreamHandler | None]:
+        """Map SDK stream event classes to their handlers.
+
+        Classes are resolved by name so SDK versions lacking one still work.
+        """
+        handlers: dict[str, _StreamHandler] = {
+            "TextEvent": self._on_text,
+            "InputJsonEvent": self._on_input_json,
+            "RawContentBlockStartEvent": self._on_content_block_start,
+            "ParsedMessageStopEvent": self._on_message_stop,
+        }
+        dispatch: dict[type, _StreamHandler | None] = {}
+        for name, handler in handlers.items():
+            cls = getattr(anthropic, name, None) or getattr(anthropic.types, name, None)
+            if isinstance(cls, type):
+                dispatch[cls] = handler
+        return dispatch
+
+    async def _handle_stream_event(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
         """Process a streaming event from Claude."""
-        event_type = type(event).__name__
+        event_cls = type(event)
+        try:
+            handler = self._stream_dispatch[event_cls]
+        except KeyError:
+            # Subclasses such as ParsedMessageStopEvent[T]; cached either way
+            handler = next(
+                (self._stream_dispatch[c] for c in event_cls.__mro__[1:]
+                 if c in self._stream_dispatch),
+                None,
+            )
+            self._stream_dispatch[event_cls] = handler
+        if handler is not None:
+            await handler(event, response, state)
+
+    async def _collect_text(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
+        if type(event) is self._text_event_cls:
+            state.text.append(event.text)
 
-        if event_type == "TextEvent":
-            response.text += event.text
-            if self.event_bus:
+    async def _on_text(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
+        state.text.append(event.text)
+        if self.event_bus:
+            if self.stream_coalesce_ms <= 0:
                 await self.event_bus.emit(Event(
                     type=EventType.STREAM_TEXT_DELTA,
                     data={"text": event.text},
                 ))
-
-        elif event_type == "InputJsonEvent":
+                return
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if not state.parts:
+                state.started = now
+                state.timer = loop.call_later(
+                    self.stream_coalesce_ms / 1000, self._flush_later, state,
+                )
+            state.parts.append(event.text)
+            state.size += len(event.text)
+            if (
+                state.size >= _STREAM_FLUSH_CHARS
+                or (now - state.started) * 1000 >= self.stream_coalesce_ms
+            ):
+                await self._flush_text_deltas(state)
+
+    async def _on_input_json(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
+        if self.event_bus:
+            await self._flush_text_deltas(state)
+            await self.event_bus.emit(Event(
+                type=EventType.STREAM_TOOL_CALL_DELTA,
+                data={"partial_json": event.partial_json},
+            ))
+
+    async def _on_content_block_start(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
+        block = event.content_block
+        if hasattr(block, "type") and block.type == "tool_use":
             if self.event_bus:
+                await self._flush_text_deltas(state)
                 await self.event_bus.emit(Event(
-                    type=EventType.STREAM_TOOL_CALL_DELTA,
-                    data={"partial_json": event.partial_json},
+                    type=EventType.STREAM_TOOL_CALL_START,
+                    data={"tool_name": block.name, "tool_id": block.id},
                 ))
 
-        elif event_type == "RawContentBlockStartEvent":
-            block = event.content_block
-            if hasattr(block, "type") and block.type == "tool_use":
-                if self.event_bus:
-                    await self.event_bus.emit(Event(
-                        type=EventType.STREAM_TOOL_CALL_START,
-                        data={"tool_name": block.name, "tool_id": block.id},
-                    ))
-
-        elif event_type == "ParsedMessageStopEvent":
-            if self.event_bus:
-                await self.event_bus.emit(Event(
-                    type=EventType.STREAM_MESSAGE_STOP,
-                    data={"stop_reason": response.stop_reason},
-                ))
+    async def _on_message_stop(
+        self, event: Any, response: LLMResponse, state: _StreamState,
+    ) -> None:
+        if self.event_bus:
+            await self._flush_text_deltas(state)
+            await self.event_bus.emit(Event(
+                type=EventType.STREAM_MESSAGE_STOP,
+                data={"stop_reason": response.stop_reason},
+            ))
+
+    def _flush_later(self, state: _StreamState) -> None:
+        """Timer callback: flush text buffered while the stream is idle."""
+        state.flush_task = asyncio.ensure_future(self._flush_text_deltas(state))
+        state.flush_task.add_done_callback(_log_flush_error)
+
+    async def _flush_text_deltas(self, state: _StreamState) -> None:
+        """Emit buffered text deltas as a single STREAM_TEXT_DELTA."""
+        if not state.parts or not self.event_bus:
+            return
+        async with state.lock:
+            if not state.parts:  # taken by the flush we waited on
+                return
+            if state.timer is not None:
+                state.timer.cancel()
+                state.timer = None
+            text = "".join(state.parts)
+            state.parts.clear()
+            state.size = 0
+            await self.event_bus.emit(Event(
+                type=EventType.STREAM_TEXT_DELTA,
+                data={"text": text},
+            ))
 
     async def close(self) -> None:
-        """Close the client."""
-        await self.client.close()
+        """Close the client, unless its HTTP client was passed in."""
+        if self._owns_http_client:
+            await self.client.close()
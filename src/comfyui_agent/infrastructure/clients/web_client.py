@@ -4,24 +4,55 @@ Provides two capabilities:
 1. fetch_url: GET any URL, extract readable text from HTML
 2. search: Web search via Tavily API (if configured) or DuckDuckGo HTML fallback
 
-Uses aiohttp for all HTTP operations. HTML text extraction uses a lightweight
-approach with regex-based tag stripping (no heavy dependencies like BeautifulSoup).
+Uses aiohttp for all HTTP operations. HTML text extraction uses selectolax
+(lexbor's C tokenizer) when installed, falling back to regex-based tag
+stripping (no heavy dependencies like BeautifulSoup).
 """
 
 from __future__ import annotations
 
+import asyncio
+import codecs
 import html
+import json
 import logging
 import re
-from typing import Any
+from typing import Any, Awaitable, Callable, TypeVar
 from urllib.parse import quote_plus
 
 import aiohttp
 
+from comfyui_agent.domain.tools.base import TTLCache
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # optional speedup, see the "fast" extra
+    HTMLParser = None
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        # aiohttp's json_serialize must return str
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 logger = logging.getLogger(__name__)
 
 _MAX_RESPONSE_SIZE = 5 * 1024 * 1024  # 5MB
+_READ_CHUNK_SIZE = 64 * 1024
 _USER_AGENT = "comfyui-agent/1.0"
+_REGISTRY_HIT_TTL = 300.0
+_REGISTRY_MISS_TTL = 60.0
+
+_T = TypeVar("_T")
 
 
 class WebClient:
@@ -35,46 +66,112 @@ class WebClient:
         self,
         tavily_api_key: str = "",
         timeout: int = 30,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 20,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
     ) -> None:
         self._tavily_api_key = tavily_api_key
         self._timeout = timeout
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
         self._session: aiohttp.ClientSession | None = None
+        self._inflight: dict[tuple[Any, ...], asyncio.Future[Any]] = {}
+        self._registry_cache: TTLCache[
+            tuple[str, tuple[str, ...]], tuple[dict[str, Any] | None]
+        ] = TTLCache(ttl=_REGISTRY_HIT_TTL, maxsize=256)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
+            # Pooled keep-alive connections + DNS cache, so repeat calls to
+            # Tavily/DDG/the Registry skip the TCP+TLS handshake.
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
             self._session = aiohttp.ClientSession(
+                connector=connector,
+                json_serialize=_json_dumps,
                 headers={"User-Agent": _USER_AGENT},
                 timeout=aiohttp.ClientTimeout(total=self._timeout),
             )
         return self._session
 
-    async def fetch_url(self, url: str, timeout: int = 30) -> dict[str, Any]:
+    async def fetch_url(
+        self,
+        url: str,
+        timeout: int = 30,
+        extra_headers: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
         """Fetch content from a URL, extracting text from HTML."""
         session = await self._get_session()
         effective_timeout = aiohttp.ClientTimeout(total=min(timeout, 120))
 
-        async with session.get(url, timeout=effective_timeout) as resp:
+        async with session.get(
+            url, timeout=effective_timeout, headers=extra_headers
+        ) as resp:
             status = resp.status
             content_type = resp.content_type or ""
-            raw = await resp.content.read(_MAX_RESPONSE_SIZE)
-            text = raw.decode("utf-8", errors="replace")
-
-        # Extract readable text from HTML
-        if "html" in content_type:
-            text = _extract_text_from_html(text)
+            headers = resp.headers
+            is_html = "html" in content_type
+            # StreamReader.read(n) returns whatever is buffered, so read
+            # chunk by chunk up to the cap. HTML is kept as bytes for the
+            # parser; anything else is decoded chunk by chunk so the raw
+            # body and its str copy are never both held in full.
+            decoder = None if is_html else codecs.getincrementaldecoder("utf-8")("replace")
+            parts: list[Any] = []
+            size = 0
+            async for chunk in resp.content.iter_chunked(_READ_CHUNK_SIZE):
+                chunk = chunk[:_MAX_RESPONSE_SIZE - size]
+                size += len(chunk)
+                parts.append(chunk if decoder is None else decoder.decode(chunk))
+                if size >= _MAX_RESPONSE_SIZE:
+                    break
+
+        # Extract readable text from HTML; only the extracted text is decoded
+        # to str when selectolax is available.
+        if decoder is None:
+            text = _extract_text_from_html_bytes(b"".join(parts))
+        else:
+            parts.append(decoder.decode(b"", final=True))
+            text = "".join(parts)
 
         return {
             "content": text,
             "content_type": content_type,
             "status_code": status,
             "url": str(url),
+            "etag": headers.get("ETag", ""),
+            "last_modified": headers.get("Last-Modified", ""),
+            "cache_control": headers.get("Cache-Control", ""),
         }
 
     async def search(self, query: str, max_results: int = 5) -> list[dict[str, Any]]:
-        """Search the web. Uses Tavily if configured, else DuckDuckGo fallback."""
-        if self._tavily_api_key:
-            return await self._search_tavily(query, max_results)
-        return await self._search_ddg(query, max_results)
+        """Search the web. Uses Tavily if configured, else DuckDuckGo fallback.
+
+        Concurrent identical searches share one request; result caching is
+        left to WebSearchTool.
+        """
+        search = self._search_tavily if self._tavily_api_key else self._search_ddg
+        return await self._coalesce(
+            ("search", query, max_results), lambda: search(query, max_results),
+        )
+
+    async def _coalesce(
+        self, key: tuple[Any, ...], fetch: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """Await ``fetch()``, or the identical request already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task)  # type: ignore[no-any-return]
 
     async def _search_tavily(
         self, query: str, max_results: int
@@ -93,7 +190,7 @@ class WebClient:
             if resp.status != 200:
                 body = await resp.text()
                 raise RuntimeError(f"Tavily API error {resp.status}: {body[:200]}")
-            data = await resp.json()
+            data = await resp.json(loads=_json_loads)
 
         results: list[dict[str, Any]] = []
         for item in data.get("results", []):
@@ -125,21 +222,43 @@ class WebClient:
 
         return _parse_ddg_html(text, max_results)
 
-    async def search_registry(self, node_id: str) -> dict[str, Any] | None:
-        """Look up a custom node package on the Comfy Registry."""
+    async def search_registry(
+        self, node_id: str, fields: tuple[str, ...] = (),
+    ) -> dict[str, Any] | None:
+        """Look up a custom node package on the Comfy Registry.
+
+        Found packages are cached for 5 minutes and confirmed misses (404)
+        for 1 minute; transient failures are not cached.
+        """
+        key = (node_id, fields)
+        cached = self._registry_cache.get(key)
+        if cached is not None:
+            return cached[0]
+        data, ttl = await self._coalesce(
+            ("registry", node_id, fields), lambda: self._fetch_registry(node_id, fields),
+        )
+        if ttl:
+            self._registry_cache.set(key, (data,), ttl=ttl)
+        return data
+
+    async def _fetch_registry(
+        self, node_id: str, fields: tuple[str, ...],
+    ) -> tuple[dict[str, Any] | None, float]:
+        """Fetch a Registry entry; returns (data, seconds it may be cached)."""
         session = await self._get_session()
         url = f"https://api.comfy.org/nodes/{quote_plus(node_id)}"
+        params = {"fields": ",".join(fields)} if fields else None
         try:
-            async with session.get(url) as resp:
+            async with session.get(url, params=params) as resp:
                 if resp.status == 404:
-                    return None
+                    return None, _REGISTRY_MISS_TTL
                 if resp.status != 200:
                     logger.warning("Registry API returned %d for %s", resp.status, node_id)
-                    return None
-                return await resp.json()  # type: ignore[no-any-return]
+                    return None, 0
+                return await resp.json(loads=_json_loads), _REGISTRY_HIT_TTL
         except Exception as exc:
             logger.warning("Registry lookup failed for %s: %s", node_id, exc)
-            return None
+            return None, 0
 
     async def close(self) -> None:
         if self._session and not self._session.closed:
@@ -148,11 +267,15 @@ class WebClient:
 
 
 # ---------------------------------------------------------------------------
-# HTML processing helpers (lightweight, no external deps beyond stdlib)
+# HTML processing helpers (selectolax when available, else stdlib only)
 # ---------------------------------------------------------------------------
 
+_NON_CONTENT_TAGS = ["script", "style", "noscript"]
+
+# The fallback patterns use possessive quantifiers / tempered tokens (Python
+# 3.11+ re) instead of DOTALL .*? so a failed match can't backtrack.
 _SCRIPT_STYLE_RE = re.compile(
-    r"<(script|style|noscript)[^>]*>.*?</\1>", re.DOTALL | re.IGNORECASE
+    r"<(script|style|noscript)\b[^>]*+>(?:[^<]++|<(?!/\1>))*+</\1>", re.IGNORECASE
 )
 _TAG_RE = re.compile(r"<[^>]+>")
 _WHITESPACE_RE = re.compile(r"\n{3,}")
@@ -160,13 +283,46 @@ _WHITESPACE_RE = re.compile(r"\n{3,}")
 
 def _extract_text_from_html(raw_html: str) -> str:
     """Extract readable text from HTML, stripping tags and boilerplate."""
+    if HTMLParser is None:
+        return _extract_text_with_regex(raw_html)
+    return _extract_text_with_lexbor(raw_html)
+
+
+def _extract_text_from_html_bytes(raw_html: bytes) -> str:
+    """Like _extract_text_from_html, but for an undecoded UTF-8 body.
+
+    selectolax parses the bytes directly, so script/style payloads are
+    dropped without ever being decoded into a Python string.
+    """
+    if HTMLParser is None:
+        return _extract_text_with_regex(raw_html.decode("utf-8", errors="replace"))
+    return _extract_text_with_lexbor(raw_html)
+
+
+def _extract_text_with_lexbor(raw_html: str | bytes) -> str:
+    # lexbor tokenizes in C and decodes entities itself, so there is no
+    # separate unescape pass and no regex backtracking on large pages.
+    tree = HTMLParser(raw_html)
+    tree.strip_tags(_NON_CONTENT_TAGS)
+    root = tree.body or tree.root
+    if root is None:
+        return ""
+    return _collapse_lines(root.text(separator="\n"))
+
+
+def _extract_text_with_regex(raw_html: str) -> str:
+    """Stdlib fallback for _extract_text_from_html."""
     # Remove script/style/noscript blocks
     text = _SCRIPT_STYLE_RE.sub("", raw_html)
     # Strip all remaining tags
     text = _TAG_RE.sub("\n", text)
     # Decode HTML entities
     text = html.unescape(text)
-    # Collapse excessive whitespace
+    return _collapse_lines(text)
+
+
+def _collapse_lines(text: str) -> str:
+    """Strip each line and drop the empty ones."""
     lines = [line.strip() for line in text.splitlines()]
     text = "\n".join(line for line in lines if line)
     text = _WHITESPACE_RE.sub("\n\n", text)
@@ -174,21 +330,47 @@ def _extract_text_from_html(raw_html: str) -> str:
 
 
 _DDG_RESULT_RE = re.compile(
-    r'class="result__a"[^>]*href="([^"]*)"[^>]*>(.*?)</a>.*?'
-    r'class="result__snippet"[^>]*>(.*?)</(?:td|div)',
-    re.DOTALL | re.IGNORECASE,
+    r'class="result__a"[^>]*?href="([^"]*+)"[^>]*+>((?:[^<]++|<(?!/a>))*+)</a>'
+    # skip to this result's snippet, but never past the next result's title
+    r'(?:[^c]++|c(?!lass="result__(?:a|snippet)"))*+'
+    r'class="result__snippet"[^>]*+>((?:[^<]++|<(?!/(?:td|div)))*+)</(?:td|div)',
+    re.IGNORECASE,
 )
 
 
 def _parse_ddg_html(raw_html: str, max_results: int) -> list[dict[str, Any]]:
     """Parse DuckDuckGo HTML search results page."""
+    if HTMLParser is None:
+        return _parse_ddg_with_regex(raw_html, max_results)
+    # One linear walk over title links and snippets in document order; each
+    # snippet belongs to the title link before it.
+    results: list[dict[str, Any]] = []
+    current: dict[str, Any] | None = None
+    for node in HTMLParser(raw_html).css("a.result__a, .result__snippet"):
+        if "result__a" in (node.attributes.get("class") or "").split():
+            if len(results) >= max_results:
+                break
+            href = node.attributes.get("href") or ""
+            title = node.text().strip()
+            current = None
+            if href and title:
+                current = {"title": title, "url": href, "snippet": ""}
+                results.append(current)
+        elif current is not None and not current["snippet"]:
+            current["snippet"] = node.text().strip()
+    return results
+
+
+def _parse_ddg_with_regex(raw_html: str, max_results: int) -> list[dict[str, Any]]:
+    """Stdlib fallback for _parse_ddg_html."""
     results: list[dict[str, Any]] = []
     for match in _DDG_RESULT_RE.finditer(raw_html):
         if len(results) >= max_results:
             break
         href = html.unescape(match.group(1))
-        title = _TAG_RE.sub("", html.unescape(match.group(2))).strip()
-        snippet = _TAG_RE.sub("", html.unescape(match.group(3))).strip()
+        # Strip tags before decoding so escaped "&lt;b&gt;" stays literal text
+        title = html.unescape(_TAG_RE.sub("", match.group(2))).strip()
+        snippet = html.unescape(_TAG_RE.sub("", match.group(3))).strip()
         if href and title:
             results.append({"title": title, "url": href, "snippet": snippet})
     return results
@@ -3,12 +3,17 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 import yaml
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
+# libyaml's C loader when PyYAML was built with it, else the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class ComfyUIConfig(BaseModel):
     base_url: str = "http://127.0.0.1:6006"
@@ -26,6 +31,8 @@ class LLMConfig(BaseModel):
     max_retries: int = 5
     retry_base_delay_ms: int = 2000
     retry_max_delay_ms: int = 60000
+    stream_coalesce_ms: int = 20  # 0 = emit every text delta
+    prompt_caching: bool = True  # cache_control on tools + system prompt
 
     def resolve_api_key(self) -> str:
         if self.api_key:
@@ -43,6 +50,7 @@ class ServerConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 5200
     cors_origins: list[str] = ["*"]
+    health_ttl: float = 2.0  # seconds /api/health reuses its ComfyUI probe
 
 
 class LoggingConfig(BaseModel):
@@ -84,11 +92,19 @@ class AppConfig(BaseSettings):
     @classmethod
     def from_yaml(cls, path: str | Path = "config.yaml") -> AppConfig:
         path = Path(path)
-        if path.exists():
-            with open(path) as f:
-                data = yaml.safe_load(f) or {}
-            return cls(**data)
-        return cls()
+        try:
+            stat = path.stat()
+        except OSError:
+            return cls()
+        data = _load_yaml(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        return cls(**data)
+
+
+@lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parse a YAML file; the stat fields key the cache so edits are re-read."""
+    with open(path) as f:
+        return yaml.load(f, Loader=_YAML_LOADER) or {}
 
 
 _config: AppConfig | None = None
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import Any, Callable, Awaitable
 
 from comfyui_agent.domain.models.events import Event, EventType
@@ -33,55 +33,80 @@ class EventBus:
         self._handlers: dict[EventType, list[EventHandler]] = defaultdict(list)
         self._prefix_handlers: dict[str, list[EventHandler]] = defaultdict(list)
         self._all_handlers: list[EventHandler] = []
-        self._history: list[Event] = []
-        self._history_size = history_size
+        self._history: deque[Event] = deque(maxlen=history_size)
+        self._resolved: dict[EventType, list[EventHandler]] = {}
 
     def on(self, event_type: EventType, handler: EventHandler) -> Callable[[], None]:
         """Subscribe to a specific event type. Returns unsubscribe function."""
-        self._handlers[event_type].append(handler)
-        return lambda: self._handlers[event_type].remove(handler)
+        return self._subscribe(self._handlers[event_type], handler)
 
     def on_prefix(self, prefix: str, handler: EventHandler) -> Callable[[], None]:
         """Subscribe to all events matching a prefix (e.g., 'state.', 'comfyui.')."""
-        self._prefix_handlers[prefix].append(handler)
-        return lambda: self._prefix_handlers[prefix].remove(handler)
+        return self._subscribe(self._prefix_handlers[prefix], handler)
 
     def on_all(self, handler: EventHandler) -> Callable[[], None]:
         """Subscribe to all events."""
-        self._all_handlers.append(handler)
-        return lambda: self._all_handlers.remove(handler)
+        return self._subscribe(self._all_handlers, handler)
 
-    async def emit(self, event: Event) -> None:
-        """Emit an event to all matching subscribers."""
-        # Record history
-        self._history.append(event)
-        if len(self._history) > self._history_size:
-            self._history = self._history[-self._history_size:]
+    def _subscribe(
+        self, handlers: list[EventHandler], handler: EventHandler
+    ) -> Callable[[], None]:
+        handlers.append(handler)
+        self._resolved.clear()
 
-        # Collect all matching handlers
-        handlers: list[EventHandler] = []
+        def unsubscribe() -> None:
+            handlers.remove(handler)
+            self._resolved.clear()
 
-        # Exact match
-        if event.type in self._handlers:
-            handlers.extend(self._handlers[event.type])
+        return unsubscribe
 
-        # Prefix match
-        event_str = event.type.value
+    def _resolve(self, event_type: EventType) -> list[EventHandler]:
+        """Exact, then prefix, then catch-all handlers for an event type."""
+        handlers = list(self._handlers.get(event_type, ()))
+        event_str = event_type.value
         for prefix, prefix_handlers in self._prefix_handlers.items():
             if event_str.startswith(prefix):
                 handlers.extend(prefix_handlers)
-
-        # All handlers
         handlers.extend(self._all_handlers)
+        self._resolved[event_type] = handlers
+        return handlers
 
-        # Execute handlers
+    async def emit(self, event: Event) -> None:
+        """Emit an event to all matching subscribers."""
+        # Record history (deque drops the oldest entry once full)
+        self._history.append(event)
+
+        # Matching handlers are resolved once per event type until the
+        # subscriptions change
+        handlers = self._resolved.get(event.type)
+        if handlers is None:
+            handlers = self._resolve(event.type)
+
+        # Sync handlers run inline; coroutines from async handlers are
+        # awaited together so one slow subscriber doesn't serialize the rest
+        pending: list[Awaitable[None]] = []
         for handler in handlers:
             try:
                 result = handler(event)
-                if asyncio.iscoroutine(result):
-                    await result
             except Exception:
-                logger.exception("Event handler error for %s", event.type.value)
+                logger.exception("Event handler error for %s", event.type_str)
+                continue
+            if asyncio.iscoroutine(result):
+                pending.append(result)
+
+        if not pending:
+            return
+        if len(pending) == 1:
+            try:
+                await pending[0]
+            except Exception:
+                logger.exception("Event handler error for %s", event.type_str)
+            return
+        for outcome in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.error(
+                    "Event handler error for %s", event.type_str, exc_info=outcome
+                )
 
     def emit_sync(self, event: Event) -> None:
         """Emit an event synchronously (schedules async handlers)."""
@@ -103,4 +128,5 @@ class EventBus:
         self._handlers.clear()
         self._prefix_handlers.clear()
         self._all_handlers.clear()
+        self._resolved.clear()
         self._history.clear()
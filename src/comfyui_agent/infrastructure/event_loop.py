@@ -0,0 +1,21 @@
+"""Event loop selection for the CLI and web entry points.
+
+Uses uvloop's libuv-based loop when it is installed (see the "fast"
+extra) and falls back to the stdlib asyncio loop otherwise.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+try:
+    import uvloop
+except ImportError:  # optional speedup, see the "fast" extra
+    uvloop = None  # type: ignore[assignment]
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create the event loop the application should run on."""
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
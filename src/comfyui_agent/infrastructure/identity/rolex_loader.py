@@ -9,7 +9,9 @@ Inspired by RoleX LocalPlatform's detectIdentityType() and identity() methods.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 import re
 from pathlib import Path
 
@@ -24,6 +26,22 @@ logger = logging.getLogger(__name__)
 
 # Regex for extracting Feature name from Gherkin
 _FEATURE_RE = re.compile(r"^\s*Feature:\s*(.+)$", re.MULTILINE)
+# The Feature: line sits in the header; only scan further if it isn't there
+_FEATURE_HEAD_CHARS = 4096
+
+# (filename, mtime_ns, size) of every feature file, in load order
+_DirSignature = tuple[tuple[str, int, int], ...]
+
+
+_TYPE_RE = re.compile(
+    r"^(persona)\.identity\.feature$|\.(knowledge|experience|voice)\.identity\.feature$"
+)
+_TYPE_MAP = {
+    "persona": IdentityType.PERSONA,
+    "knowledge": IdentityType.KNOWLEDGE,
+    "experience": IdentityType.EXPERIENCE,
+    "voice": IdentityType.VOICE,
+}
 
 
 def _detect_identity_type(filename: str) -> IdentityType:
@@ -35,21 +53,19 @@ def _detect_identity_type(filename: str) -> IdentityType:
       *.experience.identity.feature → EXPERIENCE
       *.voice.identity.feature → VOICE
     """
-    if filename == "persona.identity.feature":
-        return IdentityType.PERSONA
-    if filename.endswith(".knowledge.identity.feature"):
+    match = _TYPE_RE.search(filename)
+    if match is None:
+        # Default to knowledge for unrecognized patterns
         return IdentityType.KNOWLEDGE
-    if filename.endswith(".experience.identity.feature"):
-        return IdentityType.EXPERIENCE
-    if filename.endswith(".voice.identity.feature"):
-        return IdentityType.VOICE
-    # Default to knowledge for unrecognized patterns
-    return IdentityType.KNOWLEDGE
+    return _TYPE_MAP[match[1] or match[2]]
 
 
 def _extract_feature_name(content: str) -> str:
     """Extract the Feature name from Gherkin text."""
-    match = _FEATURE_RE.search(content)
+    match = _FEATURE_RE.search(content, 0, _FEATURE_HEAD_CHARS)
+    if match is None or match.end() >= _FEATURE_HEAD_CHARS:
+        # Not in the header, or the line runs past it
+        match = _FEATURE_RE.search(content)
     return match.group(1).strip() if match else "unnamed"
 
 
@@ -62,43 +78,110 @@ class RolexIdentityLoader:
 
     def __init__(self, rolex_dir: str = "~/.rolex") -> None:
         self._rolex_dir = Path(rolex_dir).expanduser()
+        self._cache: dict[str, tuple[_DirSignature, list[IdentityFeature]]] = {}
 
     def load_identity(self, role_name: str) -> list[IdentityFeature]:
         """Load all identity features for a role.
 
         Scans {rolex_dir}/roles/{role_name}/identity/*.identity.feature
-        and parses each file into an IdentityFeature.
+        and parses each file into an IdentityFeature. Results are reused
+        until a feature file is added, removed or modified.
+        """
+        scan = self._scan(role_name)
+        if scan is None:
+            return []
+        paths, signature = scan
+        cached = self._cache.get(role_name)
+        if cached is not None and cached[0] == signature:
+            return list(cached[1])
+
+        contents: list[str | BaseException] = []
+        for path in paths:
+            try:
+                contents.append(path.read_bytes().decode("utf-8"))
+            except Exception as exc:
+                contents.append(exc)
+        return self._parse(role_name, signature, paths, contents)
+
+    async def load_identity_async(self, role_name: str) -> list[IdentityFeature]:
+        """Like load_identity, but does the file I/O in worker threads.
+
+        The directory scan runs off the event loop and the feature files
+        are read concurrently.
         """
+        scan = await asyncio.to_thread(self._scan, role_name)
+        if scan is None:
+            return []
+        paths, signature = scan
+        cached = self._cache.get(role_name)
+        if cached is not None and cached[0] == signature:
+            return list(cached[1])
+
+        raw = await asyncio.gather(
+            *(asyncio.to_thread(path.read_bytes) for path in paths),
+            return_exceptions=True,
+        )
+        contents: list[str | BaseException] = []
+        for data in raw:
+            if isinstance(data, BaseException):
+                contents.append(data)
+                continue
+            try:
+                contents.append(data.decode("utf-8"))
+            except UnicodeDecodeError as exc:
+                contents.append(exc)
+        return self._parse(role_name, signature, paths, contents)
+
+    def _scan(self, role_name: str) -> tuple[list[Path], _DirSignature] | None:
+        """List a role's feature files in load order, with their signature."""
         identity_dir = self._rolex_dir / "roles" / role_name / "identity"
-        if not identity_dir.exists():
+        try:
+            with os.scandir(identity_dir) as it:
+                entries = sorted(
+                    (e for e in it if e.name.endswith(".identity.feature")),
+                    key=lambda e: e.name,
+                )
+        except FileNotFoundError:
             logger.warning("Identity dir not found: %s", identity_dir)
-            return []
+            return None
+
+        stats = [e.stat() for e in entries]
+        signature: _DirSignature = tuple(
+            (e.name, st.st_mtime_ns, st.st_size) for e, st in zip(entries, stats)
+        )
+        return [Path(e.path) for e in entries], signature
 
+    def _parse(
+        self,
+        role_name: str,
+        signature: _DirSignature,
+        paths: list[Path],
+        contents: list[str | BaseException],
+    ) -> list[IdentityFeature]:
+        """Build features from file contents and cache them for the role."""
         features: list[IdentityFeature] = []
-        for path in sorted(identity_dir.iterdir()):
-            if not path.name.endswith(".identity.feature"):
+        for path, content in zip(paths, contents):
+            if isinstance(content, BaseException):
+                logger.warning("Failed to load %s: %s", path, content)
                 continue
-            try:
-                content = path.read_text(encoding="utf-8")
-                id_type = _detect_identity_type(path.name)
-                name = _extract_feature_name(content)
-                features.append(
-                    IdentityFeature(
-                        type=id_type,
-                        name=name,
-                        content=content,
-                        source_file=str(path),
-                    )
+            id_type = _detect_identity_type(path.name)
+            name = _extract_feature_name(content)
+            features.append(
+                IdentityFeature(
+                    type=id_type,
+                    name=name,
+                    content=content,
+                    source_file=str(path),
                 )
-                logger.debug("Loaded identity: %s (%s)", name, id_type.value)
-            except Exception as exc:
-                logger.warning("Failed to load %s: %s", path, exc)
+            )
+            logger.debug("Loaded identity: %s (%s)", name, id_type.value)
 
         logger.info(
             "Loaded %d identity features for role '%s'",
             len(features), role_name,
         )
-        return features
+        self._cache[role_name] = (signature, features)
+        return list(features)
 
     def save_experience(
         self, role_name: str, exp_name: str, gherkin_source: str
@@ -8,12 +8,138 @@ Provides:
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any
 
 import structlog
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """JSONRenderer serializer; handlers need str, orjson returns bytes."""
+    return orjson.dumps(obj, default=kwargs.get("default")).decode()
+
+
+class _CachedTimeStamper:
+    """TimeStamper that formats each wall-clock second only once.
+
+    Log bursts mostly land within one second, so strftime runs about once
+    per second; with ``fraction`` the microseconds are appended to the
+    cached prefix, which keeps the output of TimeStamper(fmt="iso"). Stdlib
+    records are stamped with their creation time rather than the time they
+    reach the formatter.
+    """
+
+    def __init__(self, fmt: str, *, utc: bool, fraction: bool) -> None:
+        self._fmt = fmt
+        self._to_struct = time.gmtime if utc else time.localtime
+        self._fraction = fraction
+        self._suffix = "Z" if utc else ""
+        # (second, formatted second); replaced whole, so threads never see
+        # a half-updated pair
+        self._last: tuple[int, str] = (-1, "")
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: structlog.types.EventDict
+    ) -> structlog.types.EventDict:
+        record = event_dict.get("_record")
+        now = record.created if record is not None else time.time()
+        second = int(now)
+        last = self._last
+        if last[0] != second:
+            last = (second, time.strftime(self._fmt, self._to_struct(second)))
+            self._last = last
+        if self._fraction:
+            micros = int((now - second) * 1_000_000)
+            event_dict["timestamp"] = f"{last[1]}.{micros:06d}{self._suffix}"
+        else:
+            event_dict["timestamp"] = last[1] + self._suffix
+        return event_dict
+
+
+# Write buffer for agent.log; records reach the disk in page-sized batches.
+_FILE_BUFFER_SIZE = 128 * 1024
+
+_listener: QueueListener | None = None
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """FileHandler whose per-record flush is deferred to flush_now()."""
+
+    def _open(self) -> Any:
+        return open(
+            self.baseFilename, self.mode, buffering=_FILE_BUFFER_SIZE,
+            encoding=self.encoding, errors=self.errors,
+        )
+
+    def flush(self) -> None:
+        # StreamHandler.emit flushes after every record; skip that here.
+        # close() still writes the buffer out when it closes the file.
+        pass
+
+    def flush_now(self) -> None:
+        super().flush()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener's handlers.
+
+    The stock prepare() pre-formats records with the default formatter,
+    which would flatten structlog's event dicts and tracebacks. Here only
+    the %-args are merged, so later mutation of them can't change the
+    message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.msg, str) and record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _FlushingQueueListener(QueueListener):
+    """Flushes buffered file handlers whenever the queue runs dry.
+
+    A burst of records is written in one go; an isolated record is on
+    disk as soon as it has been handled.
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.SimpleQueue[logging.LogRecord],
+        *handlers: logging.Handler,
+        respect_handler_level: bool = False,
+    ) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        # QueueListener.queue is typed as a bare put/get protocol
+        self._records = log_queue
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self._records.empty():
+            for handler in self.handlers:
+                if isinstance(handler, _BufferedFileHandler):
+                    handler.flush_now()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
 
 def setup_logging(level: str = "INFO", log_dir: str = "data/logs") -> None:
     """Configure structured logging for the application.
@@ -32,13 +158,15 @@ def setup_logging(level: str = "INFO", log_dir: str = "data/logs") -> None:
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
+        _CachedTimeStamper("%Y-%m-%dT%H:%M:%S", utc=True, fraction=True),
         structlog.processors.UnicodeDecoder(),
     ]
+    if log_level <= logging.DEBUG:
+        # Only renders stack_info=True calls, but costs a call per record
+        shared_processors.insert(-1, structlog.processors.StackInfoRenderer())
 
     # File handler — JSON lines for machine parsing
-    file_handler = logging.FileHandler(
+    file_handler = _BufferedFileHandler(
         log_path / "agent.log", mode="a", encoding="utf-8"
     )
     file_handler.setLevel(log_level)
@@ -47,13 +175,20 @@ def setup_logging(level: str = "INFO", log_dir: str = "data/logs") -> None:
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setLevel(log_level)
 
-    # Configure stdlib logging
+    # Configure stdlib logging. Callers only enqueue records; formatting
+    # and I/O happen on the listener's thread, off the event loop.
+    global _listener
+    _stop_listener()
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
     logging.basicConfig(
-        format="%(message)s",
         level=log_level,
-        handlers=[file_handler, console_handler],
+        handlers=[_DeferredQueueHandler(log_queue)],
         force=True,
     )
+    _listener = _FlushingQueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True,
+    )
+    _listener.start()
 
     # Suppress noisy libraries
     logging.getLogger("aiohttp").setLevel(logging.WARNING)
@@ -70,15 +205,30 @@ def setup_logging(level: str = "INFO", log_dir: str = "data/logs") -> None:
         cache_logger_on_first_use=True,
     )
 
-    # Set formatters on handlers
+    # Set formatters on handlers. Each formatter runs its pre-chain on
+    # every stdlib record, so the console gets a lighter one: people read
+    # the wall clock there, and the ISO timestamp goes only to the file.
+    console_pre_chain: list[structlog.types.Processor] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        _CachedTimeStamper("%H:%M:%S", utc=False, fraction=False),
+    ]
     console_formatter = structlog.stdlib.ProcessorFormatter(
         processor=structlog.dev.ConsoleRenderer(colors=True),
-        foreign_pre_chain=shared_processors,
+        foreign_pre_chain=console_pre_chain,
     )
     json_formatter = structlog.stdlib.ProcessorFormatter(
-        processor=structlog.processors.JSONRenderer(),
+        processor=(
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps)
+            if orjson is not None
+            else structlog.processors.JSONRenderer()
+        ),
         foreign_pre_chain=shared_processors,
     )
 
     console_handler.setFormatter(console_formatter)
     file_handler.setFormatter(json_formatter)
+
+
+atexit.register(_stop_listener)
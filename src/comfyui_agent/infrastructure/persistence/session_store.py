@@ -2,15 +2,35 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import time
 import uuid
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import aiosqlite
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        # OPT_NON_STR_KEYS matches json.dumps, which stringifies int keys
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger(__name__)
 
 SCHEMA_V1 = """
@@ -33,7 +53,104 @@ CREATE TABLE IF NOT EXISTS messages (
 CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
 """
 
-_CURRENT_VERSION = 2
+_CURRENT_VERSION = 5
+
+# V5: V3 added a per-row trigger that touched sessions.updated_at on every
+# message INSERT, so replacing an N-message history ran N UPDATEs; the
+# writers now touch each session once per batch instead
+_DROP_TOUCH_SESSION_TRIGGER = "DROP TRIGGER IF EXISTS messages_touch_session"
+
+# V4: list_sessions filters on parent_session_id IS NULL and orders by
+# updated_at; this index serves both, with no table scan or sort step
+_SESSIONS_PARENT_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_sessions_parent_updated
+ON sessions(parent_session_id, updated_at DESC)
+"""
+
+# WAL with synchronous=NORMAL fsyncs only at checkpoints, not on every
+# commit; a power loss can drop the last transactions, which is acceptable
+# for chat history.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # KiB, i.e. ~64 MB of page cache
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+# Read-only connections that serve loads while the writer is busy; WAL lets
+# them read the last committed state concurrently with a write.
+_READER_POOL_SIZE = max(2, min(4, os.cpu_count() or 2))
+_READER_PRAGMAS = (
+    "PRAGMA query_only=1",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+# Statements on the message hot paths, kept as module constants so every
+# call hands sqlite3's statement cache the same string
+_INSERT_MESSAGE = (
+    "INSERT INTO messages (session_id, role, content, created_at, ordinal) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_DELETE_MESSAGES = "DELETE FROM messages WHERE session_id = ?"
+_SELECT_MESSAGES = "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id"
+_SELECT_MESSAGES_FROM = (
+    "SELECT role, content FROM messages WHERE session_id = ? AND id >= ? ORDER BY id"
+)
+_SELECT_LAST_MESSAGE_ID = "SELECT MAX(id) FROM messages WHERE session_id = ?"
+_SELECT_NEXT_ORDINAL = (
+    "SELECT COALESCE(MAX(ordinal), -1) + 1 FROM messages WHERE session_id = ?"
+)
+_TOUCH_SESSION = "UPDATE sessions SET updated_at = ? WHERE id = ?"
+_SELECT_ROOT_SESSIONS = (
+    "SELECT * FROM sessions WHERE parent_session_id IS NULL ORDER BY updated_at DESC"
+)
+# Most appends the background writer folds into one commit.
+_WRITE_BATCH_MAX = 64
+
+_META_COLUMNS = frozenset(
+    {"title", "summary_message_id", "total_input_tokens", "total_output_tokens"}
+)
+
+_PendingAppend = tuple[tuple[str, str, str | bytes, float, int], "asyncio.Future[int]"]
+
+
+_JSON_START = frozenset('[{"')
+
+
+@lru_cache(maxsize=32)
+def _update_meta_sql(columns: tuple[str, ...]) -> str:
+    """UPDATE statement for one set of _META_COLUMNS (sorted)."""
+    set_clause = ", ".join(f"{k} = ?" for k in columns)
+    return f"UPDATE sessions SET {set_clause}, updated_at = ? WHERE id = ?"
+
+
+def _encode_content(content: Any) -> str | bytes:
+    """Store str content as-is and anything else as JSON bytes.
+
+    The JSON goes in as a BLOB: TEXT affinity leaves blobs untouched, so
+    SQLite skips UTF-8 handling on write and sqlite3 hands back the bytes
+    without decoding them to str first.
+    """
+    return content if type(content) is str else _json_dumps(content)
+
+
+def _decode_content(content: str | bytes) -> Any:
+    """Inverse of _encode_content; plain text that isn't JSON stays a str."""
+    if isinstance(content, bytes):
+        return _json_loads(content)
+    # Rows written before content went in as BLOBs hold their JSON as TEXT.
+    # That is always an array/object (or a JSON string), so ordinary text
+    # skips the parse and its raised exception entirely
+    if content[:1] not in _JSON_START:
+        return content
+    try:
+        return _json_loads(content)
+    except (ValueError, TypeError):  # both JSONDecodeErrors are ValueErrors
+        return content
 
 
 class SessionStore:
@@ -42,6 +159,15 @@ class SessionStore:
     def __init__(self, db_path: str = "data/sessions.db") -> None:
         self.db_path = db_path
         self._db: aiosqlite.Connection | None = None
+        # Next message ordinal per session, seeded from the DB on first append
+        self._next_ordinal: dict[str, int] = {}
+        # append_message hands rows to a background writer that commits
+        # whatever has queued up together
+        self._write_queue: asyncio.Queue[_PendingAppend] = asyncio.Queue()
+        self._writer_task: asyncio.Task[None] | None = None
+        self._readers: list[aiosqlite.Connection] = []
+        self._reader_turn = 0
+        self._readers_lock = asyncio.Lock()
 
     async def _get_db(self) -> aiosqlite.Connection:
         if self._db is None:
@@ -49,11 +175,30 @@ class SessionStore:
             self._db = await aiosqlite.connect(self.db_path)
             self._db.row_factory = aiosqlite.Row
             await self._db.executescript(SCHEMA_V1)
-            await self._db.execute("PRAGMA journal_mode=WAL")
+            for pragma in _PRAGMAS:
+                await self._db.execute(pragma)
             await self._db.commit()
             await self._migrate(self._db)
         return self._db
 
+    async def _get_reader(self) -> aiosqlite.Connection:
+        """Return a read-only connection, round-robin over a small pool."""
+        if not self._readers:
+            writer = await self._get_db()  # schema and migrations first
+            if self.db_path == ":memory:":
+                return writer  # a private in-memory DB can't be shared
+            async with self._readers_lock:
+                if not self._readers:
+                    uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+                    for _ in range(_READER_POOL_SIZE):
+                        reader = await aiosqlite.connect(uri, uri=True)
+                        reader.row_factory = aiosqlite.Row
+                        for pragma in _READER_PRAGMAS:
+                            await reader.execute(pragma)
+                        self._readers.append(reader)
+        self._reader_turn = (self._reader_turn + 1) % len(self._readers)
+        return self._readers[self._reader_turn]
+
     async def _migrate(self, db: aiosqlite.Connection) -> None:
         """Run schema migrations using PRAGMA user_version."""
         cursor = await db.execute("PRAGMA user_version")
@@ -73,6 +218,14 @@ class SessionStore:
                     await db.execute(stmt)
                 except Exception:
                     pass  # column already exists
+
+        if version < 4:
+            await db.execute(_SESSIONS_PARENT_INDEX)
+
+        if version < 5:
+            await db.execute(_DROP_TOUCH_SESSION_TRIGGER)
+
+        if version < _CURRENT_VERSION:
             await db.execute(f"PRAGMA user_version = {_CURRENT_VERSION}")
             await db.commit()
             logger.info("DB migrated to version %d", _CURRENT_VERSION)
@@ -93,52 +246,58 @@ class SessionStore:
         return session_id
 
     async def list_sessions(self) -> list[dict[str, Any]]:
-        db = await self._get_db()
-        cursor = await db.execute(
-            "SELECT * FROM sessions WHERE parent_session_id IS NULL ORDER BY updated_at DESC"
-        )
+        db = await self._get_reader()
+        cursor = await db.execute(_SELECT_ROOT_SESSIONS)
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
     async def delete_session(self, session_id: str) -> None:
         db = await self._get_db()
-        await db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        await db.execute(_DELETE_MESSAGES, (session_id,))
         await db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
         await db.commit()
+        self._next_ordinal.pop(session_id, None)
 
     async def save_messages(self, session_id: str, messages: list[dict[str, Any]]) -> None:
         """Replace all messages for a session (backward compatible)."""
         db = await self._get_db()
         now = time.time()
 
-        await db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        for i, msg in enumerate(messages):
-            content = json.dumps(msg.get("content", "")) if not isinstance(msg.get("content"), str) else msg["content"]
-            await db.execute(
-                "INSERT INTO messages (session_id, role, content, created_at, ordinal) VALUES (?, ?, ?, ?, ?)",
-                (session_id, msg["role"], content, now, i),
+        # _encode_content inlined: this runs once per message of the history
+        rows = [
+            (
+                session_id,
+                msg["role"],
+                content if type(content) is str else _json_dumps(content),
+                now,
+                i,
             )
-        await db.execute(
-            "UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id)
-        )
+            for i, msg in enumerate(messages)
+            for content in (msg.get("content", ""),)
+        ]
+        # One transaction (opened implicitly by the DELETE) and one
+        # executemany instead of a worker-thread round-trip per row
+        await db.execute(_DELETE_MESSAGES, (session_id,))
+        await db.executemany(_INSERT_MESSAGE, rows)
+        await db.execute(_TOUCH_SESSION, (now, session_id))
         await db.commit()
+        self._next_ordinal[session_id] = len(rows)
 
     async def load_messages(self, session_id: str) -> list[dict[str, Any]]:
-        db = await self._get_db()
-        cursor = await db.execute(
-            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id",
-            (session_id,),
-        )
+        return await self._fetch_messages(_SELECT_MESSAGES, (session_id,))
+
+    async def _fetch_messages(
+        self, sql: str, params: tuple[Any, ...]
+    ) -> list[dict[str, Any]]:
+        db = await self._get_reader()
+        cursor = await db.execute(sql, params)
+        # Plain tuples: only positional access is needed, skip building Rows
+        cursor.row_factory = None
         rows = await cursor.fetchall()
-        messages = []
-        for row in rows:
-            content = row["content"]
-            try:
-                content = json.loads(content)
-            except (json.JSONDecodeError, TypeError):
-                pass
-            messages.append({"role": row["role"], "content": content})
-        return messages
+        return [
+            {"role": role, "content": _decode_content(content)}
+            for role, content in rows
+        ]
 
     # ------------------------------------------------------------------
     # New methods for incremental persistence
@@ -148,49 +307,90 @@ class SessionStore:
         """Append a single message, return its row ID."""
         db = await self._get_db()
         now = time.time()
-        if not isinstance(content, str):
-            content = json.dumps(content)
+        content = _encode_content(content)
 
         # Get next ordinal
-        cursor = await db.execute(
-            "SELECT COALESCE(MAX(ordinal), -1) + 1 FROM messages WHERE session_id = ?",
-            (session_id,),
-        )
-        row = await cursor.fetchone()
-        ordinal = row[0] if row else 0
+        if session_id not in self._next_ordinal:
+            cursor = await db.execute(_SELECT_NEXT_ORDINAL, (session_id,))
+            row = await cursor.fetchone()
+            # A concurrent append may have seeded it while we awaited
+            self._next_ordinal.setdefault(session_id, row[0] if row else 0)
+        ordinal = self._next_ordinal[session_id]
+        self._next_ordinal[session_id] = ordinal + 1
 
-        cursor = await db.execute(
-            "INSERT INTO messages (session_id, role, content, created_at, ordinal) VALUES (?, ?, ?, ?, ?)",
-            (session_id, role, content, now, ordinal),
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        future: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait(
+            ((session_id, role, content, now, ordinal), future)
         )
-        msg_id = cursor.lastrowid
-        await db.execute(
-            "UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id)
+        return await future
+
+    async def flush(self) -> None:
+        """Wait until every queued append has been committed."""
+        await self._write_queue.join()
+
+    async def _writer_loop(self) -> None:
+        """Commit queued appends, folding those queued meanwhile into one batch.
+
+        Nothing waits for more rows to arrive, so a lone append commits
+        immediately; only appends that pile up behind a commit share one.
+        """
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < _WRITE_BATCH_MAX and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    async def _write_batch(self, batch: list[_PendingAppend]) -> None:
+        db = await self._get_db()
+        inserted: list[tuple[asyncio.Future[int], int]] = []
+        # session_id -> created_at of its newest row in this batch
+        touched: dict[str, float] = {}
+        for params, future in batch:
+            try:
+                row = await db.execute_insert(_INSERT_MESSAGE, params)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            inserted.append((future, row[0]))  # type: ignore[index]
+            touched[params[0]] = params[3]
+        # One UPDATE per session, however many of its messages were batched
+        await db.executemany(
+            _TOUCH_SESSION, [(now, sid) for sid, now in touched.items()]
         )
         await db.commit()
-        return msg_id  # type: ignore[return-value]
+        for future, msg_id in inserted:
+            if not future.done():
+                future.set_result(msg_id)
 
     async def load_messages_from(self, session_id: str, from_id: int = 0) -> list[dict[str, Any]]:
         """Load messages starting from a given message ID (for summary checkpoint)."""
-        db = await self._get_db()
-        cursor = await db.execute(
-            "SELECT role, content FROM messages WHERE session_id = ? AND id >= ? ORDER BY id",
-            (session_id, from_id),
-        )
-        rows = await cursor.fetchall()
-        messages = []
-        for row in rows:
-            content = row["content"]
-            try:
-                content = json.loads(content)
-            except (json.JSONDecodeError, TypeError):
-                pass
-            messages.append({"role": row["role"], "content": content})
-        return messages
+        return await self._fetch_messages(_SELECT_MESSAGES_FROM, (session_id, from_id))
+
+    async def last_message_id(self, session_id: str) -> int | None:
+        """ID of the session's newest committed message, None if it has none.
+
+        Message rows are only ever inserted or deleted, never updated, and
+        IDs are AUTOINCREMENT, so this changes whenever the history does.
+        """
+        db = await self._get_reader()
+        cursor = await db.execute(_SELECT_LAST_MESSAGE_ID, (session_id,))
+        row = await cursor.fetchone()
+        return row[0] if row else None
 
     async def get_session_meta(self, session_id: str) -> dict[str, Any]:
         """Get session metadata."""
-        db = await self._get_db()
+        db = await self._get_reader()
         cursor = await db.execute(
             "SELECT * FROM sessions WHERE id = ?", (session_id,)
         )
@@ -202,18 +402,14 @@ class SessionStore:
     async def update_session_meta(self, session_id: str, **kwargs: Any) -> None:
         """Update session metadata fields."""
         db = await self._get_db()
-        allowed = {"title", "summary_message_id", "total_input_tokens", "total_output_tokens"}
-        updates = {k: v for k, v in kwargs.items() if k in allowed}
+        updates = {k: v for k, v in kwargs.items() if k in _META_COLUMNS}
         if not updates:
             return
-        set_clause = ", ".join(f"{k} = ?" for k in updates)
-        values = list(updates.values())
+        columns = tuple(sorted(updates))
+        values = [updates[k] for k in columns]
         values.append(time.time())
         values.append(session_id)
-        await db.execute(
-            f"UPDATE sessions SET {set_clause}, updated_at = ? WHERE id = ?",
-            values,
-        )
+        await db.execute(_update_meta_sql(columns), values)
         await db.commit()
 
     async def create_child_session(self, parent_id: str, title: str) -> str:
@@ -229,6 +425,13 @@ class SessionStore:
         return session_id
 
     async def close(self) -> None:
+        if self._writer_task is not None:
+            await self.flush()
+            self._writer_task.cancel()
+            self._writer_task = None
+        for reader in self._readers:
+            await reader.close()
+        self._readers.clear()
         if self._db:
             await self._db.close()
             self._db = None
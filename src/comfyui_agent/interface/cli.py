@@ -12,8 +12,10 @@ from __future__ import annotations
 import asyncio
 import logging
 import sys
+import time
+from functools import lru_cache
 
-from rich.console import Console
+from rich.console import Console, Group, RenderableType
 from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -30,23 +32,82 @@ from comfyui_agent.infrastructure.clients.comfyui_client import ComfyUIClient
 from comfyui_agent.infrastructure.clients.web_client import WebClient
 from comfyui_agent.infrastructure.config import AppConfig
 from comfyui_agent.infrastructure.event_bus import EventBus
+from comfyui_agent.infrastructure.event_loop import new_event_loop
 from comfyui_agent.infrastructure.identity.rolex_loader import (
     RolexIdentityLoader,
     features_to_sections,
 )
-from comfyui_agent.infrastructure.clients.llm_client import LLMClient
+from comfyui_agent.infrastructure.clients.llm_client import (
+    LLMClient,
+    build_shared_http_client,
+    close_shared_http_client,
+)
 from comfyui_agent.infrastructure.persistence.session_store import SessionStore
 
 logger = logging.getLogger(__name__)
 
 console = Console()
 
+# Streamed Markdown is re-parsed once this much text or time has piled up
+_REPARSE_MIN_CHARS = 64
+_REPARSE_INTERVAL = 0.1  # seconds
+
+
+@lru_cache(maxsize=128)
+def _tool_display_name(tool_name: str) -> str:
+    """"comfyui_queue_prompt" -> "Queue Prompt"; tool names are a small fixed set."""
+    return tool_name.replace("comfyui_", "").replace("_", " ").title()
+
+
+class _StreamingMarkdown:
+    """Markdown renderable fed by text deltas.
+
+    Deltas are only appended; joining and parsing happen when Live
+    refreshes. Markdown re-parses the whole reply each time, so it is only
+    rebuilt once enough new text (or time) has accumulated; frames in
+    between show the last parse followed by the new tail as plain text.
+    """
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self._final = False
+        self._markdown: Markdown | None = None
+        self._parsed_count = 0
+        self._parsed_at = 0.0
+        self._view: tuple[int, RenderableType] | None = None
+
+    def __rich__(self) -> RenderableType:
+        count = len(self.parts)
+        if self._view is not None and self._view[0] == count:
+            return self._view[1]
+        tail = "".join(self.parts[self._parsed_count:count])
+        now = time.monotonic()
+        if (
+            self._markdown is None
+            or self._final
+            or len(tail) >= _REPARSE_MIN_CHARS
+            or now - self._parsed_at >= _REPARSE_INTERVAL
+        ):
+            self._markdown = Markdown("".join(self.parts[:count]))
+            self._parsed_count = count
+            self._parsed_at = now
+            view: RenderableType = self._markdown
+        else:
+            view = Group(self._markdown, Text(tail))
+        self._view = (count, view)
+        return view
+
+    def finish(self) -> None:
+        """Render everything as Markdown from the next frame on."""
+        self._final = True
+        self._view = None
+
 
 class CLIRenderer:
     """Renders agent events to the terminal in a natural conversation style."""
 
     def __init__(self) -> None:
-        self._streaming_text = ""
+        self._streaming = _StreamingMarkdown()
         self._live: Live | None = None
         self._current_tool: str | None = None
 
@@ -67,9 +128,9 @@ class CLIRenderer:
         console.print(f"[bold blue]You:[/bold blue] {text}")
 
     def start_streaming(self) -> None:
-        self._streaming_text = ""
+        self._streaming = _StreamingMarkdown()
         self._live = Live(
-            Text("", style="dim"),
+            self._streaming,
             console=console,
             refresh_per_second=15,
             vertical_overflow="visible",
@@ -77,12 +138,12 @@ class CLIRenderer:
         self._live.start()
 
     def stream_text(self, delta: str) -> None:
-        self._streaming_text += delta
-        if self._live:
-            self._live.update(Markdown(self._streaming_text))
+        self._streaming.parts.append(delta)
 
     def stop_streaming(self) -> None:
         if self._live:
+            # Live.stop() draws one last frame; make it a full parse
+            self._streaming.finish()
             self._live.stop()
             self._live = None
 
@@ -95,8 +156,9 @@ class CLIRenderer:
     def print_tool_start(self, tool_name: str) -> None:
         self.stop_streaming()
         self._current_tool = tool_name
-        display_name = tool_name.replace("comfyui_", "").replace("_", " ").title()
-        console.print(f"\n  [yellow]⚡[/yellow] [dim]{display_name}...[/dim]", end="")
+        console.print(
+            f"\n  [yellow]⚡[/yellow] [dim]{_tool_display_name(tool_name)}...[/dim]", end=""
+        )
 
     def print_tool_result(self, tool_name: str, is_error: bool) -> None:
         if is_error:
@@ -200,6 +262,9 @@ async def run_cli() -> None:
         model=config.llm.model,
         max_tokens=config.llm.max_tokens,
         event_bus=event_bus,
+        stream_coalesce_ms=config.llm.stream_coalesce_ms,
+        prompt_caching=config.llm.prompt_caching,
+        http_client=build_shared_http_client(),
     )
 
     session_store = SessionStore(db_path=config.agent.session_db)
@@ -229,7 +294,7 @@ async def run_cli() -> None:
     if config.identity.role_name:
         try:
             identity_loader = RolexIdentityLoader(rolex_dir=config.identity.rolex_dir)
-            features = identity_loader.load_identity(config.identity.role_name)
+            features = await identity_loader.load_identity_async(config.identity.role_name)
             if features:
                 identity_sections = features_to_sections(
                     features, role_name=config.identity.role_name,
@@ -267,8 +332,8 @@ async def run_cli() -> None:
         canvas_state=canvas_state,
     )
 
-    # Health check
-    comfyui_ok = await comfyui.health_check()
+    # Health check (also prewarms the connection pool)
+    comfyui_ok = await comfyui.warmup()
     renderer.print_welcome(comfyui_ok)
 
     if comfyui_ok:
@@ -287,10 +352,7 @@ async def run_cli() -> None:
         while True:
             try:
                 with patch_stdout():
-                    user_input = await asyncio.get_event_loop().run_in_executor(
-                        None,
-                        lambda: prompt_session.prompt("→ "),
-                    )
+                    user_input = await prompt_session.prompt_async("→ ")
             except (EOFError, KeyboardInterrupt):
                 break
 
@@ -313,13 +375,14 @@ async def run_cli() -> None:
         console.print("\n[dim]Goodbye![/dim]")
         await comfyui.close()
         await llm.close()
+        await close_shared_http_client()
         await web_client.close()
         await session_store.close()
 
 
 def main() -> None:
     """Entry point."""
-    asyncio.run(run_cli())
+    asyncio.run(run_cli(), loop_factory=new_event_loop)
 
 
 if __name__ == "__main__":
@@ -14,14 +14,18 @@ Provides:
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import logging
-import uuid
+import re
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import cached_property
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
-from aiohttp import web
-import aiohttp_cors
+from aiohttp import WSCloseCode, web
 import yaml
 
 from comfyui_agent.application.agent_loop import AgentLoop
@@ -39,18 +43,149 @@ from comfyui_agent.infrastructure.clients.comfyui_client import ComfyUIClient
 from comfyui_agent.infrastructure.clients.web_client import WebClient
 from comfyui_agent.infrastructure.config import AppConfig
 from comfyui_agent.infrastructure.event_bus import EventBus
+from comfyui_agent.infrastructure.event_loop import new_event_loop
 from comfyui_agent.infrastructure.identity.rolex_loader import (
     RolexIdentityLoader,
     features_to_sections,
 )
-from comfyui_agent.infrastructure.clients.llm_client import LLMClient
+from comfyui_agent.infrastructure.clients.llm_client import (
+    LLMClient,
+    build_shared_http_client,
+    close_shared_http_client,
+)
 from comfyui_agent.infrastructure.logging_setup import setup_logging
 from comfyui_agent.infrastructure.persistence.session_store import SessionStore
 from comfyui_agent.knowledge.node_index import NodeIndex
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_bytes(obj: Any) -> bytes:
+        # OPT_NON_STR_KEYS matches json.dumps, which stringifies int keys
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def _json_dumps(obj: Any) -> str:
+        return _json_bytes(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+    def _json_bytes(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+def _json_response(data: Any, *, status: int = 200) -> web.Response:
+    """web.json_response, but with the body encoded straight to bytes."""
+    return web.Response(body=_json_bytes(data), status=status, content_type="application/json")
+
 logger = logging.getLogger(__name__)
 
+# Chat messages a WebSocket may have waiting behind the one being answered
+_WS_CHAT_QUEUE_MAX = 8
+# Frames for one WebSocket queued within this window go out as one message
+_WS_COALESCE_WINDOW = 0.005  # seconds
+# A client this far behind is disconnected rather than buffered for
+_WS_MAX_PENDING_FRAMES = 1000
+_WS_MAX_WRITE_BUFFER = 1024 * 1024  # bytes
+# Frames are mostly short JSON events, where deflate costs CPU for little
+# saving; protocol pings every 30 s drop dead peers; client messages are
+# chat text, so anything past 1 MiB is refused
+_WS_HEARTBEAT = 30.0  # seconds
+_WS_MAX_MSG_SIZE = 1024 * 1024  # bytes
+
+# Reply to the browser's keepalive pings, encoded once
+_PONG_FRAME = _json_dumps({"type": "pong"})
+
+# Session IDs are uuid4 strings; anything else is refused before SQLite
+_SID_RE = re.compile(r"\A[0-9a-f-]{8,36}\Z")
+
+# Sessions whose encoded message history is kept for repeat fetches
+_MESSAGES_CACHE_SIZE = 256
+
+# Shared read-only stand-in for an empty request body
+_EMPTY_BODY: MappingProxyType[str, Any] = MappingProxyType({})
+
+# Grace period for open connections when the server stops
+_SHUTDOWN_TIMEOUT = 2.0  # seconds
+
+
+class _ChatSocket:
+    """One chat WebSocket: the sessions it chats in and its outgoing frames.
+
+    Frames queued within _WS_COALESCE_WINDOW of each other are sent as a
+    single message, a JSON array the client unpacks; a lone frame is sent
+    as-is. Only one drain task sends at a time, so frames stay in order.
+
+    A client that stops reading is closed once its frames back up past
+    _WS_MAX_PENDING_FRAMES or the socket's write buffer passes
+    _WS_MAX_WRITE_BUFFER, so a stalled consumer can't grow memory forever.
+    """
+
+    def __init__(
+        self, ws: web.WebSocketResponse, transport: asyncio.BaseTransport | None
+    ) -> None:
+        self.ws = ws
+        self._transport = transport
+        self._closing: asyncio.Task[bool] | None = None
+        self.sessions: set[str] = set()
+        # Chat messages are answered one at a time by a single worker, so a
+        # client can't pile up concurrent agent runs on one socket
+        self.chats: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue(_WS_CHAT_QUEUE_MAX)
+        self._frames: list[str] = []
+        self._sender: asyncio.Task[None] | None = None
+
+    def send_frame(self, frame: str) -> None:
+        if self.ws.closed or self._closing is not None:
+            return
+        if (
+            len(self._frames) >= _WS_MAX_PENDING_FRAMES
+            or self._unsent_bytes() > _WS_MAX_WRITE_BUFFER
+        ):
+            self._close_slow_consumer()
+            return
+        self._frames.append(frame)
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._drain())
+
+    def send_json(self, data: Any) -> None:
+        self.send_frame(_json_dumps(data))
+
+    def _unsent_bytes(self) -> int:
+        if isinstance(self._transport, asyncio.WriteTransport):
+            return self._transport.get_write_buffer_size()
+        return 0
+
+    def _close_slow_consumer(self) -> None:
+        logger.warning(
+            "Closing slow WebSocket client (%d frames queued, %d bytes unsent)",
+            len(self._frames), self._unsent_bytes(),
+        )
+        self._frames.clear()
+        if self._sender is not None:
+            self._sender.cancel()  # likely stuck waiting for the socket to drain
+        self._closing = asyncio.create_task(
+            self.ws.close(code=WSCloseCode.INTERNAL_ERROR, message=b"slow consumer")
+        )
 
+    async def _drain(self) -> None:
+        try:
+            await asyncio.sleep(_WS_COALESCE_WINDOW)
+            # Frames queued while a send is in flight go out with the next one
+            while self._frames and not self.ws.closed:
+                frames, self._frames = self._frames, []
+                message = frames[0] if len(frames) == 1 else f"[{','.join(frames)}]"
+                try:
+                    await self.ws.send_str(message)
+                except Exception:
+                    break
+        finally:
+            self._frames.clear()
+            self._sender = None
 
 
 class WebServer:
@@ -80,6 +215,9 @@ class WebServer:
             max_retries=config.llm.max_retries,
             retry_base_delay_ms=config.llm.retry_base_delay_ms,
             retry_max_delay_ms=config.llm.retry_max_delay_ms,
+            stream_coalesce_ms=config.llm.stream_coalesce_ms,
+            prompt_caching=config.llm.prompt_caching,
+            http_client=build_shared_http_client(),
         )
         self.session_store = SessionStore(db_path=config.agent.session_db)
         self.node_index = NodeIndex()
@@ -88,6 +226,41 @@ class WebServer:
             tavily_api_key=config.web.resolve_tavily_key(),
             timeout=config.web.timeout,
         )
+        # (expires_at, connected, system_stats) of the last ComfyUI probe
+        self._health_probe: tuple[float, bool, dict[str, Any] | None] | None = None
+        # Probe in flight; polls arriving meanwhile wait for it, not a new one
+        self._health_probing: asyncio.Task[tuple[bool, dict[str, Any] | None]] | None = None
+        # Encoded /api/health body and the inputs it was built from
+        self._health_body: tuple[tuple[Any, ...], bytes] | None = None
+        # session_id -> (last message ID, encoded /messages body), LRU order
+        self._messages_cache: OrderedDict[str, tuple[int | None, bytes]] = OrderedDict()
+        # Sockets that have sent a chat message, and those chatting in each
+        # session; one bus subscription fans events out from these. Sockets
+        # that only ping or cancel get no events.
+        self._ws_clients: set[_ChatSocket] = set()
+        self._ws_sessions: dict[str, set[_ChatSocket]] = {}
+        # Client message type -> handler
+        self._ws_handlers: dict[
+            str, Callable[[_ChatSocket, dict[str, Any]], Awaitable[None]]
+        ] = {
+            "chat": self._ws_chat,
+            "cancel": self._ws_cancel,
+            "ping": self._ws_ping,
+        }
+        # Numbers connections for the connect/disconnect log lines
+        self._ws_conn_ids = itertools.count(1)
+        # Per-connection chat workers, kept referenced until they finish
+        self._ws_workers: set[asyncio.Task[None]] = set()
+        self.event_bus.on_all(self._broadcast_event)
+
+    @cached_property
+    def agent(self) -> AgentLoop:
+        """The agent loop and everything only it uses, built on first chat.
+
+        Health, session and config requests don't touch any of this, so the
+        server starts (and answers probes) without loading tools, identity
+        or the self-reflection wiring.
+        """
         tools = create_all_tools(self.comfyui, self.node_index, web=self.web_client)
         readonly_tools = create_readonly_tools(self.comfyui, self.node_index)
         subagent_tool = SubAgentTool(
@@ -98,9 +271,9 @@ class WebServer:
         )
         tools.append(subagent_tool)
         context_manager = ContextManager(
-            model=config.llm.model,
-            max_output_tokens=config.llm.max_tokens,
-            context_budget=config.agent.context_budget,
+            model=self.config.llm.model,
+            max_output_tokens=self.config.llm.max_tokens,
+            context_budget=self.config.agent.context_budget,
         )
         summarizer = Summarizer(
             llm=self.llm,
@@ -120,19 +293,19 @@ class WebServer:
 
         # Load RoleX identity if configured
         self._identity_loader: RolexIdentityLoader | None = None
-        if config.identity.role_name:
+        if self.config.identity.role_name:
             try:
-                loader = RolexIdentityLoader(rolex_dir=config.identity.rolex_dir)
-                features = loader.load_identity(config.identity.role_name)
+                loader = RolexIdentityLoader(rolex_dir=self.config.identity.rolex_dir)
+                features = loader.load_identity(self.config.identity.role_name)
                 if features:
                     identity_sections = features_to_sections(
-                        features, role_name=config.identity.role_name,
+                        features, role_name=self.config.identity.role_name,
                     )
                     for section in identity_sections:
                         prompt_builder.register_section(section)
                     logger.info(
                         "Loaded %d identity sections for role '%s'",
-                        len(identity_sections), config.identity.role_name,
+                        len(identity_sections), self.config.identity.role_name,
                     )
                 self._identity_loader = loader
             except Exception as exc:
@@ -141,22 +314,22 @@ class WebServer:
         # Wire ExperienceSynthesizer for self-reflection
         from comfyui_agent.application.experience_synthesizer import ExperienceSynthesizer
         self._experience_synthesizer: ExperienceSynthesizer | None = None
-        if self._identity_loader and config.identity.role_name:
+        if self._identity_loader and self.config.identity.role_name:
             self._experience_synthesizer = ExperienceSynthesizer(
                 identity_port=self._identity_loader,
                 event_bus=self.event_bus,
-                role_name=config.identity.role_name,
+                role_name=self.config.identity.role_name,
                 llm=self.llm,
                 prompt_builder=prompt_builder,
             )
-            logger.info("ExperienceSynthesizer wired for role '%s'", config.identity.role_name)
+            logger.info("ExperienceSynthesizer wired for role '%s'", self.config.identity.role_name)
 
-        self.agent = AgentLoop(
+        return AgentLoop(
             llm=self.llm,
             tools=tools,
             session_store=self.session_store,
             event_bus=self.event_bus,
-            max_iterations=config.agent.max_iterations,
+            max_iterations=self.config.agent.max_iterations,
             context_manager=context_manager,
             summarizer=summarizer,
             prompt_builder=prompt_builder,
@@ -164,48 +337,79 @@ class WebServer:
             environment_probe=environment_probe,
             canvas_state=canvas_state,
         )
-        self._ws_clients: dict[str, list[web.WebSocketResponse]] = {}
 
     def create_app(self) -> web.Application:
         app = web.Application()
         app.on_startup.append(self._on_startup)
         app.on_shutdown.append(self._on_shutdown)
 
+        # CORS — allow ComfyUI frontend (and other origins) to access the API
+        app.middlewares.append(self._cors_preflight)
+        app.on_response_prepare.append(self._cors_headers)
+
         # API routes
-        health = app.router.add_get("/api/health", self.handle_health)
-        sessions_list = app.router.add_get("/api/sessions", self.handle_list_sessions)
-        sessions_create = app.router.add_post("/api/sessions", self.handle_create_session)
-        sessions_delete = app.router.add_delete(
-            "/api/sessions/{session_id}", self.handle_delete_session
-        )
-        sessions_messages = app.router.add_get(
+        app.router.add_get("/api/health", self.handle_health)
+        app.router.add_get("/api/sessions", self.handle_list_sessions)
+        app.router.add_post("/api/sessions", self.handle_create_session)
+        app.router.add_delete("/api/sessions/{session_id}", self.handle_delete_session)
+        app.router.add_get(
             "/api/sessions/{session_id}/messages", self.handle_session_messages
         )
-        chat = app.router.add_post("/api/chat", self.handle_chat)
-        chat_ws = app.router.add_get("/api/chat/ws", self.handle_chat_ws)
-        config_get = app.router.add_get("/api/config", self.handle_get_config)
-        config_put = app.router.add_put("/api/config", self.handle_put_config)
-
-        # CORS — allow ComfyUI frontend (and other origins) to access the API
-        cors = aiohttp_cors.setup(
-            app,
-            defaults={
-                origin: aiohttp_cors.ResourceOptions(
-                    allow_credentials=True,
-                    allow_headers="*",
-                    allow_methods="*",
-                )
-                for origin in self.config.server.cors_origins
-            },
-        )
-        for route in [health, sessions_list, sessions_create, sessions_delete, sessions_messages, chat, chat_ws, config_get, config_put]:
-            cors.add(route)
+        app.router.add_post("/api/chat", self.handle_chat)
+        app.router.add_get("/api/chat/ws", self.handle_chat_ws)
+        app.router.add_get("/api/config", self.handle_get_config)
+        app.router.add_put("/api/config", self.handle_put_config)
 
         return app
 
+    # ------------------------------------------------------------------
+    # CORS
+    # ------------------------------------------------------------------
+
+    def _cors_allowed(self, origin: str) -> bool:
+        origins = self.config.server.cors_origins
+        return "*" in origins or origin in origins
+
+    @web.middleware
+    async def _cors_preflight(
+        self, request: web.Request, handler: Callable[[web.Request], Awaitable[web.StreamResponse]]
+    ) -> web.StreamResponse:
+        """Answer CORS preflight requests before routing."""
+        origin = request.headers.get("Origin")
+        method = request.headers.get("Access-Control-Request-Method")
+        if request.method != "OPTIONS" or origin is None or method is None:
+            return await handler(request)
+        if not self._cors_allowed(origin):
+            raise web.HTTPForbidden(text=f"CORS origin {origin!r} is not allowed")
+        # Credentials are allowed, so browsers take "*" literally: echo
+        # the requested method and headers instead
+        headers = {
+            "Access-Control-Allow-Origin": origin,
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Allow-Methods": method,
+            "Vary": "Origin",
+        }
+        requested_headers = request.headers.get("Access-Control-Request-Headers")
+        if requested_headers:
+            headers["Access-Control-Allow-Headers"] = requested_headers
+        return web.Response(headers=headers)
+
+    async def _cors_headers(self, request: web.Request, response: web.StreamResponse) -> None:
+        """on_response_prepare: mark responses to allowed origins readable."""
+        origin = request.headers.get("Origin")
+        if (
+            origin is None
+            or "Access-Control-Allow-Origin" in response.headers
+            or not self._cors_allowed(origin)
+        ):
+            return
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.headers.add("Vary", "Origin")
+
     async def _on_startup(self, app: web.Application) -> None:
         logger.info("Starting ComfyUI Agent server...")
-        comfyui_ok = await self.comfyui.health_check()
+        comfyui_ok = await self.comfyui.warmup()
         if comfyui_ok:
             logger.info("ComfyUI connected at %s", self.config.comfyui.base_url)
             await self.comfyui.connect_ws()
@@ -214,7 +418,7 @@ class WebServer:
             logger.info(
                 "Node index: %d nodes in %d categories",
                 self.node_index.node_count,
-                len(self.node_index.categories),
+                self.node_index.category_count,
             )
         else:
             logger.warning(
@@ -225,6 +429,7 @@ class WebServer:
         logger.info("Shutting down...")
         await self.comfyui.close()
         await self.llm.close()
+        await close_shared_http_client()
         await self.web_client.close()
         await self.session_store.close()
 
@@ -232,77 +437,138 @@ class WebServer:
     # Handlers
     # ------------------------------------------------------------------
 
+    async def _probe_comfyui(self) -> tuple[bool, dict[str, Any] | None]:
+        """ComfyUI reachability and system stats, cached for a couple of seconds.
+
+        health_check() is itself a system_stats request, so one request
+        answers both questions. Concurrent callers share a single probe.
+        """
+        now = asyncio.get_running_loop().time()
+        if self._health_probe is not None and now < self._health_probe[0]:
+            return self._health_probe[1], self._health_probe[2]
+        if self._health_probing is None:
+            self._health_probing = asyncio.create_task(self._run_probe())
+            self._health_probing.add_done_callback(self._clear_probe_task)
+        # Shielded: one client hanging up must not cancel the others' probe
+        return await asyncio.shield(self._health_probing)
+
+    def _clear_probe_task(self, task: asyncio.Task[Any]) -> None:
+        self._health_probing = None
+
+    async def _run_probe(self) -> tuple[bool, dict[str, Any] | None]:
+        try:
+            stats: dict[str, Any] | None = await self.comfyui.get_system_stats()
+            comfyui_ok = True
+        except Exception:
+            stats = None
+            comfyui_ok = False
+        # Dashboards poll /api/health often; they share one probe per TTL
+        ttl = self.config.server.health_ttl
+        expires = asyncio.get_running_loop().time() + ttl
+        self._health_probe = (expires, comfyui_ok, stats)
+        return comfyui_ok, stats
+
     async def handle_health(self, request: web.Request) -> web.Response:
-        comfyui_ok = await self.comfyui.health_check()
-        stats = None
-        if comfyui_ok:
-            try:
-                stats = await self.comfyui.get_system_stats()
-            except Exception:
-                pass
-        return web.json_response({
-            "status": "ok",
-            "comfyui": {
-                "connected": comfyui_ok,
-                "url": self.config.comfyui.base_url,
-                "stats": stats,
-            },
-            "llm": {
-                "model": self.config.llm.model,
-            },
-            "node_index": {
-                "built": self.node_index.is_built,
-                "node_count": self.node_index.node_count,
-                "categories": len(self.node_index.categories),
-            },
-        })
+        comfyui_ok, stats = await self._probe_comfyui()
+        index = self.node_index
+        # Between probes (and config or index changes) the body is identical,
+        # so polls reuse the encoded bytes; the probe's expiry marks its age
+        key = (
+            self._health_probe[0] if self._health_probe else None,
+            self.config.comfyui.base_url,
+            self.config.llm.model,
+            index.is_built,
+            index.node_count,
+            index.category_count,
+        )
+        if self._health_body is None or self._health_body[0] != key:
+            body = _json_bytes({
+                "status": "ok",
+                "comfyui": {
+                    "connected": comfyui_ok,
+                    "url": self.config.comfyui.base_url,
+                    "stats": stats,
+                },
+                "llm": {
+                    "model": self.config.llm.model,
+                },
+                "node_index": {
+                    "built": index.is_built,
+                    "node_count": index.node_count,
+                    "categories": index.category_count,
+                },
+            })
+            self._health_body = (key, body)
+        return web.Response(body=self._health_body[1], content_type="application/json")
 
     async def handle_list_sessions(self, request: web.Request) -> web.Response:
         sessions = await self.session_store.list_sessions()
-        return web.json_response({"sessions": sessions})
+        return _json_response({"sessions": sessions})
 
     async def handle_create_session(self, request: web.Request) -> web.Response:
-        body = await request.json() if request.content_length else {}
-        title = body.get("title", "New Session")
+        # Chunked bodies have no content_length, so read() and check the bytes
+        raw = await request.read()
+        body = _json_loads(raw) if raw else _EMPTY_BODY
+        title = body.get("title") or "New Session"
         session_id = await self.session_store.create_session(title)
-        return web.json_response({"session_id": session_id, "title": title})
+        return _json_response({"session_id": session_id, "title": title})
 
     async def handle_delete_session(self, request: web.Request) -> web.Response:
         session_id = request.match_info["session_id"]
+        if not _SID_RE.match(session_id):
+            return _json_response({"error": "invalid session_id"}, status=400)
         await self.session_store.delete_session(session_id)
-        return web.json_response({"deleted": session_id})
+        self._messages_cache.pop(session_id, None)
+        return _json_response({"deleted": session_id})
 
     async def handle_session_messages(self, request: web.Request) -> web.Response:
         """Load session messages in frontend ChatItem format."""
         session_id = request.match_info["session_id"]
-        messages = await self.session_store.load_messages(session_id)
-        items = api_messages_to_chat_items(messages)
-        return web.json_response({
-            "session_id": session_id,
-            "items": items,
-        })
+        if not _SID_RE.match(session_id):
+            return _json_response({"error": "invalid session_id"}, status=400)
+        # The newest message ID versions the history: while it is unchanged,
+        # the encoded items are reused and clients can revalidate with an ETag
+        last_id = await self.session_store.last_message_id(session_id)
+        etag = f'"{last_id}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        cached = self._messages_cache.get(session_id)
+        if cached is not None and cached[0] == last_id:
+            self._messages_cache.move_to_end(session_id)
+            body = cached[1]
+        else:
+            messages = await self.session_store.load_messages(session_id)
+            body = _json_bytes({
+                "session_id": session_id,
+                "items": api_messages_to_chat_items(messages),
+            })
+            self._messages_cache[session_id] = (last_id, body)
+            self._messages_cache.move_to_end(session_id)
+            if len(self._messages_cache) > _MESSAGES_CACHE_SIZE:
+                self._messages_cache.popitem(last=False)
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
 
     async def handle_chat(self, request: web.Request) -> web.Response:
         """HTTP POST chat — returns full response (non-streaming)."""
-        body = await request.json()
+        body = _json_loads(await request.read())
         session_id = body.get("session_id")
         message = body.get("message", "")
 
         if not message:
-            return web.json_response({"error": "message is required"}, status=400)
+            return _json_response({"error": "message is required"}, status=400)
 
         if not session_id:
             session_id = await self.session_store.create_session("API Session")
 
         try:
             response = await self.agent.run(session_id, message)
-            return web.json_response({
+            return _json_response({
                 "session_id": session_id,
                 "response": response,
             })
         except Exception as e:
             logger.exception("Chat error")
-            return web.json_response(
+            return _json_response(
                 {"error": str(e), "session_id": session_id}, status=500
             )
 
@@ -320,7 +586,7 @@ class WebServer:
     async def handle_get_config(self, request: web.Request) -> web.Response:
         """Return safe config fields with API keys masked."""
         cfg = self.config
-        return web.json_response({
+        return _json_response({
             "llm": {
                 "provider": cfg.llm.provider,
                 "model": cfg.llm.model,
@@ -340,7 +606,7 @@ class WebServer:
 
     async def handle_put_config(self, request: web.Request) -> web.Response:
         """Update config fields and persist to config.yaml."""
-        body = await request.json()
+        body = _json_loads(await request.read())
 
         # Load current YAML to preserve structure
         config_path = Path("config.yaml")
@@ -399,112 +665,148 @@ class WebServer:
             yaml.dump(raw, f, default_flow_style=False, allow_unicode=True)
 
         logger.info("Config updated: %s", ", ".join(updated_fields))
-        return web.json_response({
+        return _json_response({
             "status": "ok",
             "updated": updated_fields,
         })
 
     async def handle_chat_ws(self, request: web.Request) -> web.WebSocketResponse:
         """WebSocket chat — bidirectional streaming."""
-        ws = web.WebSocketResponse()
+        ws = web.WebSocketResponse(
+            compress=False, heartbeat=_WS_HEARTBEAT, max_msg_size=_WS_MAX_MSG_SIZE,
+        )
         await ws.prepare(request)
-        logger.info("WebSocket client connected")
+        conn_id = next(self._ws_conn_ids)
+        logger.info("WebSocket client connected: #%d", conn_id)
 
-        # Track this connection
-        conn_id = str(uuid.uuid4())
-        unsubscribers: list[Any] = []
+        # Events are forwarded once it sends its first chat (see _ws_chat)
+        conn = _ChatSocket(ws, request.transport)
+        worker = asyncio.create_task(self._ws_chat_worker(conn))
+        self._ws_workers.add(worker)
+        worker.add_done_callback(self._ws_workers.discard)
 
         try:
-            # Subscribe to events and forward to this WebSocket
-            async def forward_event(event: Event) -> None:
-                if ws.closed:
-                    return
-                try:
-                    await ws.send_json({
-                        "type": "event",
-                        "event_type": event.type.value,
-                        "data": event.data,
-                        "session_id": event.session_id,
-                        "timestamp": event.timestamp,
-                    })
-                except Exception:
-                    pass
-
-            # Subscribe to all events
-            unsub = self.event_bus.on_all(forward_event)
-            unsubscribers.append(unsub)
-
             # Process incoming messages
             async for msg in ws:
                 if msg.type == web.WSMsgType.TEXT:
                     try:
-                        data = json.loads(msg.data)
-                        await self._handle_ws_message(ws, data)
+                        data = _json_loads(msg.data)
+                        await self._handle_ws_message(conn, data)
                     except json.JSONDecodeError:
-                        await ws.send_json({"type": "error", "error": "Invalid JSON"})
+                        conn.send_json({"type": "error", "error": "Invalid JSON"})
                 elif msg.type == web.WSMsgType.ERROR:
                     logger.error("WebSocket error: %s", ws.exception())
 
         finally:
-            for unsub in unsubscribers:
-                unsub()
-            logger.info("WebSocket client disconnected: %s", conn_id)
+            self._ws_clients.discard(conn)
+            for session_id in conn.sessions:
+                watchers = self._ws_sessions[session_id]
+                watchers.discard(conn)
+                if not watchers:
+                    del self._ws_sessions[session_id]
+            # Drop chats that haven't started; a run in progress finishes
+            # (and is saved) before the worker exits
+            while not conn.chats.empty():
+                conn.chats.get_nowait()
+            conn.chats.put_nowait(None)
+            logger.info("WebSocket client disconnected: #%d", conn_id)
 
         return ws
 
-    async def _handle_ws_message(
-        self, ws: web.WebSocketResponse, data: dict[str, Any]
-    ) -> None:
+    def _broadcast_event(self, event: Event) -> None:
+        """Queue an event on the WebSockets it concerns, encoding it once.
+
+        Session events go only to sockets chatting in that session; events
+        without one (ComfyUI progress, stream deltas) go to every socket
+        that has chatted.
+        """
+        if event.session_id:
+            targets = self._ws_sessions.get(event.session_id)
+        else:
+            targets = self._ws_clients
+        if not targets:
+            return
+        try:
+            frame = _json_dumps({
+                "type": "event",
+                "event_type": event.type_str,
+                "data": event.data,
+                "session_id": event.session_id,
+                "timestamp": event.timestamp,
+            })
+        except (TypeError, ValueError):
+            return  # e.g. binary preview frames, which aren't JSON-encodable
+        for conn in targets:
+            conn.send_frame(frame)
+
+    async def _handle_ws_message(self, conn: _ChatSocket, data: dict[str, Any]) -> None:
         """Process a message from a WebSocket client."""
-        msg_type = data.get("type", "")
+        handler = self._ws_handlers.get(data.get("type", ""))
+        if handler is not None:
+            await handler(conn, data)
+
+    async def _ws_chat(self, conn: _ChatSocket, data: dict[str, Any]) -> None:
+        session_id = data.get("session_id")
+        message = data.get("message", "")
+
+        if not message:
+            conn.send_json({"type": "error", "error": "message is required"})
+            return
+
+        if conn.chats.full():
+            conn.send_json({
+                "type": "error",
+                "session_id": session_id,
+                "error": "Too many messages queued, wait for a response",
+            })
+            return
 
-        if msg_type == "chat":
-            session_id = data.get("session_id")
-            message = data.get("message", "")
+        if not session_id:
+            session_id = await self.session_store.create_session("WS Session")
+            conn.send_json({
+                "type": "session_created",
+                "session_id": session_id,
+            })
 
-            if not message:
-                await ws.send_json({"type": "error", "error": "message is required"})
-                return
+        if session_id not in conn.sessions:
+            self._ws_clients.add(conn)
+            conn.sessions.add(session_id)
+            self._ws_sessions.setdefault(session_id, set()).add(conn)
 
-            if not session_id:
-                session_id = await self.session_store.create_session("WS Session")
-                await ws.send_json({
-                    "type": "session_created",
-                    "session_id": session_id,
-                })
+        # Answered by _ws_chat_worker so we can keep receiving messages
+        conn.chats.put_nowait((session_id, message))
 
-            # Run agent in background so we can keep receiving messages
-            asyncio.create_task(self._run_agent_for_ws(ws, session_id, message))
+    async def _ws_cancel(self, conn: _ChatSocket, data: dict[str, Any]) -> None:
+        session_id = data.get("session_id", "")
+        # Before the first chat there is no agent, and nothing to cancel
+        if session_id and "agent" in self.__dict__:
+            self.agent.cancel(session_id)
+            conn.send_json({"type": "cancelled", "session_id": session_id})
 
-        elif msg_type == "cancel":
-            session_id = data.get("session_id", "")
-            if session_id:
-                self.agent.cancel(session_id)
-                await ws.send_json({"type": "cancelled", "session_id": session_id})
+    async def _ws_ping(self, conn: _ChatSocket, data: dict[str, Any]) -> None:
+        conn.send_frame(_PONG_FRAME)
 
-        elif msg_type == "ping":
-            await ws.send_json({"type": "pong"})
+    async def _ws_chat_worker(self, conn: _ChatSocket) -> None:
+        """Run a connection's chat messages in order until it disconnects."""
+        while (item := await conn.chats.get()) is not None:
+            await self._run_agent_for_ws(conn, *item)
 
-    async def _run_agent_for_ws(
-        self, ws: web.WebSocketResponse, session_id: str, message: str
-    ) -> None:
+    async def _run_agent_for_ws(self, conn: _ChatSocket, session_id: str, message: str) -> None:
         """Run the agent loop and send the final response via WebSocket."""
         try:
             response = await self.agent.run(session_id, message)
-            if not ws.closed:
-                await ws.send_json({
-                    "type": "response",
-                    "session_id": session_id,
-                    "content": response,
-                })
+            conn.send_json({
+                "type": "response",
+                "session_id": session_id,
+                "content": response,
+            })
         except Exception as e:
             logger.exception("Agent error for WS session %s", session_id)
-            if not ws.closed:
-                await ws.send_json({
-                    "type": "error",
-                    "session_id": session_id,
-                    "error": str(e),
-                })
+            conn.send_json({
+                "type": "error",
+                "session_id": session_id,
+                "error": str(e),
+            })
 
 
 def create_server(config: AppConfig | None = None) -> WebServer:
@@ -525,4 +827,14 @@ def run_server() -> None:
     logger.info(
         "Starting server on %s:%d", config.server.host, config.server.port
     )
-    web.run_app(app, host=config.server.host, port=config.server.port)
+    web.run_app(
+        app,
+        host=config.server.host,
+        port=config.server.port,
+        loop=new_event_loop(),
+        # The aiohttp loggers are held at WARNING, so access lines were
+        # never written; skip building them per request
+        access_log=None,
+        # Don't hold a restart for up to a minute behind long-lived sockets
+        shutdown_timeout=_SHUTDOWN_TIMEOUT,
+    )
@@ -49,6 +49,10 @@ class NodeIndex:
     def categories(self) -> list[str]:
         return sorted(self._by_category.keys())
 
+    @property
+    def category_count(self) -> int:
+        return len(self._by_category)
+
     async def build(self, client: ComfyUIPort) -> None:
         """Fetch all node info from ComfyUI and build the index."""
         logger.info("Building node index...")
@@ -456,6 +460,7 @@ class NodeIndex:
 
 # Regex for splitting identifiers: CamelCase, snake_case, slashes
 _SPLIT_RE = re.compile(r"[A-Z][a-z]+|[a-z]+|[A-Z]+(?=[A-Z][a-z]|\b)")
+_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9]+")
 
 
 class _SearchFields:
@@ -484,7 +489,7 @@ def _tokenize(text: str) -> list[str]:
     Returns lowercase tokens with length >= 2.
     """
     # Split on non-alphanumeric boundaries
-    parts = re.split(r"[^a-zA-Z0-9]+", text)
+    parts = _NON_ALNUM_RE.split(text)
     tokens: list[str] = []
     for part in parts:
         lower = part.lower()
@@ -0,0 +1,52 @@
+"""Tests for AgentLoop."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from comfyui_agent.application.agent_loop import AgentLoop
+
+
+class TestTokenUsage:
+    @pytest.mark.asyncio
+    async def test_input_tokens_include_cached_prompt(self):
+        session_store = AsyncMock()
+        session_store.get_session_meta = AsyncMock(return_value={})
+        session_store.load_messages_from = AsyncMock(return_value=[])
+        session_store.append_message = AsyncMock(return_value=1)
+
+        event_bus = AsyncMock()
+        event_bus.emit = AsyncMock()
+
+        llm = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.text = "done"
+        mock_response.tool_calls = []
+        mock_response.has_tool_calls.return_value = False
+        mock_response.usage = {
+            "input_tokens": 10,
+            "output_tokens": 5,
+            "cache_read_input_tokens": 900,
+            "cache_creation_input_tokens": 90,
+        }
+        llm.chat = AsyncMock(return_value=mock_response)
+
+        loop = AgentLoop(
+            llm=llm, tools=[], session_store=session_store, event_bus=event_bus,
+        )
+        await loop.run("s1", "hello")
+
+        meta = session_store.update_session_meta.call_args.kwargs
+        assert meta["total_input_tokens"] == 1000
+        assert meta["total_output_tokens"] == 5
+
+        turn_end = event_bus.emit.call_args_list[-1].args[0]
+        assert turn_end.type.value == "turn.end"
+        assert turn_end.data["usage"] == {
+            "input_tokens": 1000,
+            "output_tokens": 5,
+            "cache_read_input_tokens": 900,
+            "cache_creation_input_tokens": 90,
+        }
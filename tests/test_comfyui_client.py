@@ -0,0 +1,324 @@
+"""Tests for ComfyUIClient WebSocket event handling."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+import pytest
+from aiohttp import test_utils, web
+
+from comfyui_agent.domain.models.events import Event, EventType
+from comfyui_agent.infrastructure.clients.comfyui_client import ComfyUIClient
+from comfyui_agent.infrastructure.event_bus import EventBus
+
+
+class FakeWS:
+    """Async-iterable stand-in for aiohttp's ClientWebSocketResponse."""
+
+    def __init__(self, frames: list[Any]) -> None:
+        self._frames = frames
+        self.closed = False
+
+    def __aiter__(self) -> FakeWS:
+        return self
+
+    async def __anext__(self) -> Any:
+        if not self._frames:
+            raise StopAsyncIteration
+        return self._frames.pop(0)
+
+
+def _text(payload: dict[str, Any]) -> SimpleNamespace:
+    return SimpleNamespace(type=aiohttp.WSMsgType.TEXT, data=json.dumps(payload))
+
+
+@pytest.fixture
+def bus() -> EventBus:
+    return EventBus()
+
+
+@pytest.fixture
+def client(bus: EventBus) -> ComfyUIClient:
+    return ComfyUIClient(event_bus=bus)
+
+
+class TestWebSocketBatching:
+    async def test_consecutive_progress_frames_coalesced(
+        self, client: ComfyUIClient, bus: EventBus
+    ) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        await client._handle_ws_batch([
+            {"type": "progress", "data": {"value": 1, "max": 3}},
+            {"type": "progress", "data": {"value": 2, "max": 3}},
+            {"type": "progress", "data": {"value": 3, "max": 3}},
+            {"type": "executed", "data": {"node": "9"}},
+        ])
+
+        assert [e.type for e in received] == [
+            EventType.COMFYUI_PROGRESS_BATCH,
+            EventType.COMFYUI_EXECUTED,
+        ]
+        assert [f["value"] for f in received[0].data["frames"]] == [1, 2, 3]
+
+    async def test_single_progress_frame_not_batched(
+        self, client: ComfyUIClient, bus: EventBus
+    ) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        await client._handle_ws_batch([{"type": "progress", "data": {"value": 1}}])
+
+        assert len(received) == 1
+        assert received[0].type == EventType.COMFYUI_PROGRESS
+        assert received[0].data == {"value": 1}
+
+    async def test_listener_drains_socket_in_order(
+        self, client: ComfyUIClient, bus: EventBus
+    ) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+        client._ws = FakeWS([  # type: ignore[assignment]
+            _text({"type": "executing", "data": {"node": "3"}}),
+            _text({"type": "progress", "data": {"value": 1}}),
+            _text({"type": "progress", "data": {"value": 2}}),
+            SimpleNamespace(type=aiohttp.WSMsgType.BINARY, data=b"\x00png"),
+            _text({"type": "execution_error", "data": {"node": "3"}}),
+        ])
+
+        await client._ws_listener()
+
+        assert [e.type for e in received] == [
+            EventType.COMFYUI_EXECUTING,
+            EventType.COMFYUI_PROGRESS_BATCH,
+            EventType.COMFYUI_PREVIEW,
+            EventType.COMFYUI_ERROR,
+        ]
+        assert received[2].data["image_data"] == b"\x00png"
+
+    async def test_slow_subscriber_stops_socket_reads(
+        self, client: ComfyUIClient, bus: EventBus
+    ) -> None:
+        gate = asyncio.Event()
+
+        async def blocked(event: Event) -> None:
+            await gate.wait()
+
+        bus.on(EventType.COMFYUI_EXECUTED, blocked)
+        ws = FakeWS([_text({"type": "executed", "data": {}}) for _ in range(1000)])
+        client._ws = ws  # type: ignore[assignment]
+
+        listener = asyncio.create_task(client._ws_listener())
+        await asyncio.sleep(0.05)
+
+        # The queue is bounded, so most frames are still unread on the socket
+        assert len(ws._frames) > 800
+        listener.cancel()
+        await listener
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+
+
+class TestWaitForPrompt:
+    async def test_wakes_on_ws_completion(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        calls = 0
+
+        async def get_history(prompt_id: str) -> dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            return {} if calls == 1 else {prompt_id: {"outputs": {"9": {}}}}
+
+        monkeypatch.setattr(client, "get_history", get_history)
+        client._ws = FakeWS([])  # type: ignore[assignment]
+
+        waiter = asyncio.create_task(client.wait_for_prompt("p1", timeout=5))
+        await asyncio.sleep(0)
+        await client._handle_ws_message(
+            {"type": "executing", "data": {"node": None, "prompt_id": "p1"}}
+        )
+
+        assert await waiter == {"outputs": {"9": {}}}
+        assert calls == 2
+        assert client._pending == {}
+
+    async def test_execution_error_raises(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        async def get_history(prompt_id: str) -> dict[str, Any]:
+            return {}
+
+        monkeypatch.setattr(client, "get_history", get_history)
+        client._ws = FakeWS([])  # type: ignore[assignment]
+
+        waiter = asyncio.create_task(client.wait_for_prompt("p1", timeout=5))
+        await asyncio.sleep(0)
+        await client._handle_ws_message({
+            "type": "execution_error",
+            "data": {"prompt_id": "p1", "exception_message": "OOM"},
+        })
+
+        with pytest.raises(RuntimeError, match="OOM"):
+            await waiter
+
+    async def test_polls_with_backoff_without_ws(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        delays: list[float] = []
+        calls = 0
+
+        async def get_history(prompt_id: str) -> dict[str, Any]:
+            nonlocal calls
+            calls += 1
+            return {prompt_id: {"outputs": {}}} if calls == 5 else {}
+
+        async def sleep(delay: float) -> None:
+            delays.append(delay)
+
+        monkeypatch.setattr(client, "get_history", get_history)
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+
+        assert await client.wait_for_prompt("p1", timeout=60) == {"outputs": {}}
+        assert delays == [0.25, 0.375, 0.5625, 0.84375]
+
+
+class TestWarmup:
+    async def test_probes_concurrently(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        started: list[str] = []
+        gate = asyncio.Event()
+
+        def probe(name: str, result: Any) -> Any:
+            async def run() -> Any:
+                started.append(name)
+                if len(started) == 3:
+                    gate.set()
+                await asyncio.wait_for(gate.wait(), 1)
+                return result
+            return run
+
+        monkeypatch.setattr(client, "get_system_stats", probe("stats", {}))
+        monkeypatch.setattr(client, "manager_available", probe("manager", True))
+        monkeypatch.setattr(client, "get_folder_paths", probe("paths", {}))
+
+        assert await client.warmup() is True
+        assert sorted(started) == ["manager", "paths", "stats"]
+
+    async def test_unreachable_when_stats_fail(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        async def fail() -> Any:
+            raise aiohttp.ClientConnectionError("refused")
+
+        async def ok() -> Any:
+            return {}
+
+        monkeypatch.setattr(client, "get_system_stats", fail)
+        monkeypatch.setattr(client, "manager_available", ok)
+        monkeypatch.setattr(client, "get_folder_paths", fail)
+
+        assert await client.warmup() is False
+
+
+class TestListingCache:
+    async def test_object_info_cached_until_invalidated(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        paths: list[str] = []
+
+        async def get(path: str, **kwargs: Any) -> dict[str, Any]:
+            paths.append(path)
+            return {"KSampler": {}}
+
+        monkeypatch.setattr(client, "_get", get)
+
+        assert await client.get_object_info() == {"KSampler": {}}
+        await client.get_object_info()
+        assert paths == ["/api/object_info"]
+
+        client.invalidate_caches()
+        await client.get_object_info()
+        assert len(paths) == 2
+
+    async def test_unknown_node_class_cached(
+        self, client: ComfyUIClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        paths: list[str] = []
+
+        async def get(path: str, **kwargs: Any) -> dict[str, Any]:
+            paths.append(path)
+            return {}
+
+        monkeypatch.setattr(client, "_get", get)
+
+        await client.get_object_info("Missing")
+        await client.get_object_info("Missing")
+        assert paths == ["/api/object_info/Missing"]
+
+
+class TestPost:
+    @pytest.fixture
+    async def server(self) -> Any:
+        async def handle(request: web.Request) -> web.Response:
+            kind = request.match_info["kind"]
+            if kind == "json":
+                return web.json_response({"ok": True})
+            if kind == "text-json":
+                return web.Response(text='{"n": 1}', content_type="text/plain")
+            if kind == "text":
+                return web.Response(text="queued")
+            return web.Response(body=b"")
+
+        app = web.Application()
+        app.router.add_post("/{kind}", handle)
+        server = test_utils.TestServer(app)
+        await server.start_server()
+        yield server
+        await server.close()
+
+    async def test_response_bodies(self, server: test_utils.TestServer) -> None:
+        client = ComfyUIClient(base_url=str(server.make_url("")))
+        try:
+            assert await client._post("/json") == {"ok": True}
+            assert await client._post("/text-json") == {"n": 1}
+            assert await client._post("/text") == {"status": "ok", "raw": "queued"}
+            assert await client._post("/empty") == {"status": "ok"}
+        finally:
+            await client.close()
+
+
+class TestManagerAvailable:
+    async def test_probe_cached_and_reset_by_reboot(self) -> None:
+        probes = 0
+
+        async def show_menu(request: web.Request) -> web.Response:
+            nonlocal probes
+            probes += 1
+            return web.Response(text="true")
+
+        async def reboot(request: web.Request) -> web.Response:
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_get("/manager/show_menu", show_menu)
+        app.router.add_get("/manager/reboot", reboot)
+        server = test_utils.TestServer(app)
+        await server.start_server()
+        client = ComfyUIClient(base_url=str(server.make_url("")))
+        try:
+            assert await client.manager_available() is True
+            assert await client.manager_available() is True
+            assert probes == 1
+
+            await client.manager_reboot()
+            await client.manager_available()
+            assert probes == 2
+        finally:
+            await client.close()
+            await server.close()
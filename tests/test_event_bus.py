@@ -74,6 +74,18 @@ class TestEventBusSubscription:
         await bus.emit(Event(type=EventType.STATE_THINKING))
         assert len(received) == 1  # no new events after unsubscribe
 
+    @pytest.mark.asyncio
+    async def test_late_subscription_after_dispatch(self, bus: EventBus):
+        order = []
+        bus.on_all(lambda e: order.append("all"))
+        await bus.emit(Event(type=EventType.STATE_THINKING))
+
+        bus.on_prefix("state.", lambda e: order.append("prefix"))
+        bus.on(EventType.STATE_THINKING, lambda e: order.append("exact"))
+        await bus.emit(Event(type=EventType.STATE_THINKING))
+
+        assert order == ["all", "exact", "prefix", "all"]
+
 
 class TestEventBusHistory:
     @pytest.mark.asyncio
@@ -134,6 +146,25 @@ class TestEventBusErrorHandling:
         assert len(received) == 1  # good_handler still ran
 
 
+class TestEventBusConcurrency:
+    @pytest.mark.asyncio
+    async def test_async_handlers_run_concurrently(self, bus: EventBus):
+        both_started = asyncio.Event()
+        started = []
+
+        async def handler(event: Event) -> None:
+            started.append(event)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), 1)
+
+        bus.on(EventType.STATE_THINKING, handler)
+        bus.on_all(handler)
+
+        await bus.emit(Event(type=EventType.STATE_THINKING))
+        assert len(started) == 2
+
+
 class TestEventBusSyncHandler:
     @pytest.mark.asyncio
     async def test_sync_handler(self, bus: EventBus):
@@ -145,3 +176,11 @@ class TestEventBusSyncHandler:
         bus.on(EventType.STATE_THINKING, sync_handler)
         await bus.emit(Event(type=EventType.STATE_THINKING))
         assert len(received) == 1
+
+
+class TestEvent:
+    def test_type_str_precomputed(self):
+        event = Event(type=EventType.STREAM_TEXT_DELTA, data={"text": "hi"})
+        assert event.type_str == "stream.text_delta"
+        assert event == Event(type=EventType.STREAM_TEXT_DELTA, data={"text": "hi"},
+                              timestamp=event.timestamp)
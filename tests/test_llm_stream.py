@@ -0,0 +1,253 @@
+"""Tests for LLMClient request payloads and stream event handling."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import TypeVar
+
+import pytest
+from anthropic.lib.streaming import InputJsonEvent, ParsedMessageStopEvent, TextEvent
+
+from comfyui_agent.domain.models.events import Event, EventType
+from comfyui_agent.infrastructure.clients.llm_client import (
+    LLMClient,
+    LLMResponse,
+    ToolSchema,
+    _StreamState,
+    build_shared_http_client,
+    close_shared_http_client,
+)
+from comfyui_agent.infrastructure.event_bus import EventBus
+
+
+def _text(text: str) -> TextEvent:
+    return TextEvent.model_construct(type="text", text=text, snapshot="")
+
+
+@pytest.fixture
+def bus() -> EventBus:
+    return EventBus()
+
+
+def _client(bus: EventBus, coalesce_ms: int = 1000) -> LLMClient:
+    return LLMClient(api_key="test-key", event_bus=bus, stream_coalesce_ms=coalesce_ms)
+
+
+async def _feed(client: LLMClient, events: list[object]) -> LLMResponse:
+    response = LLMResponse()
+    state = _StreamState()
+    for event in events:
+        await client._handle_stream_event(event, response, state)
+    await client._flush_text_deltas(state)
+    response.text = "".join(state.text)
+    return response
+
+
+class TestTextDeltaCoalescing:
+    async def test_deltas_merged_until_flush(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        response = await _feed(_client(bus), [_text("Hel"), _text("lo"), _text("!")])
+
+        assert response.text == "Hello!"
+        assert [e.data for e in received] == [{"text": "Hello!"}]
+
+    async def test_flushed_before_tool_call_delta(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        await _feed(_client(bus), [
+            _text("a"),
+            _text("b"),
+            InputJsonEvent.model_construct(type="input_json", partial_json="{", snapshot={}),
+            _text("c"),
+            ParsedMessageStopEvent.model_construct(type="message_stop", message=SimpleNamespace()),
+        ])
+
+        assert [(e.type, e.data) for e in received] == [
+            (EventType.STREAM_TEXT_DELTA, {"text": "ab"}),
+            (EventType.STREAM_TOOL_CALL_DELTA, {"partial_json": "{"}),
+            (EventType.STREAM_TEXT_DELTA, {"text": "c"}),
+            (EventType.STREAM_MESSAGE_STOP, {"stop_reason": ""}),
+        ]
+
+    async def test_size_threshold_flushes_early(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+        client = _client(bus)
+        response = LLMResponse()
+        state = _StreamState()
+
+        await client._handle_stream_event(_text("x" * 300), response, state)
+
+        assert [e.data["text"] for e in received] == ["x" * 300]
+
+    async def test_idle_stream_flushed_by_timer(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+        client = _client(bus, coalesce_ms=10)
+        state = _StreamState()
+
+        await client._handle_stream_event(_text("Hel"), LLMResponse(), state)
+        await asyncio.sleep(0.05)  # no further deltas arrive
+
+        assert [e.data["text"] for e in received] == ["Hel"]
+        assert state.timer is None and state.parts == []
+
+    async def test_failed_attempt_cancels_timer_flush(self, bus: EventBus) -> None:
+        gate = asyncio.Event()
+        delivered: list[str] = []
+        cancelled: list[str] = []
+
+        async def slow_handler(event: Event) -> None:
+            try:
+                await gate.wait()
+            except asyncio.CancelledError:
+                cancelled.append(event.data["text"])
+                raise
+            delivered.append(event.data["text"])
+
+        bus.on(EventType.STREAM_TEXT_DELTA, slow_handler)
+        client = _client(bus, coalesce_ms=10)
+
+        class FailingStream:
+            async def __aenter__(self) -> FailingStream:
+                return self
+
+            async def __aexit__(self, *exc: object) -> None:
+                return None
+
+            async def __aiter__(self):  # type: ignore[no-untyped-def]
+                yield _text("Hel")
+                await asyncio.sleep(0.05)  # the idle timer starts a flush
+                raise ConnectionError("stream dropped")
+
+        client.client = SimpleNamespace(  # type: ignore[assignment]
+            messages=SimpleNamespace(stream=lambda **kwargs: FailingStream()),
+        )
+
+        with pytest.raises(ConnectionError):
+            await client._do_chat({})
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.sleep(0)
+
+        assert cancelled == ["Hel"] and delivered == []
+
+    async def test_disabled_emits_every_delta(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        await _feed(_client(bus, coalesce_ms=0), [_text("a"), _text("b")])
+
+        assert [e.data["text"] for e in received] == ["a", "b"]
+
+
+class TestStreamDispatch:
+    async def test_parametrized_event_class_dispatched(self, bus: EventBus) -> None:
+        # The SDK builds ParsedMessageStopEvent[ResponseFormatT] at runtime
+        received: list[Event] = []
+        bus.on_all(received.append)
+        stop_cls = ParsedMessageStopEvent[TypeVar("T")]
+
+        await _feed(_client(bus), [
+            stop_cls.model_construct(type="message_stop", message=SimpleNamespace()),
+        ])
+
+        assert [e.type for e in received] == [EventType.STREAM_MESSAGE_STOP]
+
+    async def test_unknown_events_ignored(self, bus: EventBus) -> None:
+        received: list[Event] = []
+        bus.on_all(received.append)
+
+        response = await _feed(_client(bus), [SimpleNamespace(type="ping")])
+
+        assert response.text == ""
+        assert received == []
+
+
+class TestPayloadCache:
+    def test_same_tools_list_reuses_payload(self) -> None:
+        client = LLMClient(api_key="test-key")
+        tools = [ToolSchema(name="t", description="d", input_schema={})]
+
+        first = client._tools_payload(tools)
+
+        assert client._tools_payload(tools) is first
+        assert first == [{
+            "name": "t", "description": "d", "input_schema": {},
+            "cache_control": {"type": "ephemeral"},
+        }]
+        assert "cache_control" not in tools[0].rendered
+
+    def test_prompt_caching_disabled(self) -> None:
+        client = LLMClient(api_key="test-key", prompt_caching=False)
+        tools = [ToolSchema(name="t", description="d", input_schema={})]
+
+        assert client._tools_payload(tools) == [tools[0].rendered]
+        assert client._system_payload("sys") == [{"type": "text", "text": "sys"}]
+
+    def test_grown_tools_list_rebuilt(self) -> None:
+        client = LLMClient(api_key="test-key")
+        tools = [ToolSchema(name="a", description="", input_schema={})]
+        client._tools_payload(tools)
+
+        tools.append(ToolSchema(name="b", description="", input_schema={}))
+
+        assert [t["name"] for t in client._tools_payload(tools)] == ["a", "b"]
+
+    def test_swapped_tool_rebuilt(self) -> None:
+        client = LLMClient(api_key="test-key")
+        tools = [ToolSchema(name="a", description="", input_schema={})]
+        client._tools_payload(tools)
+
+        tools[0] = ToolSchema(name="b", description="", input_schema={})
+
+        assert [t["name"] for t in client._tools_payload(tools)] == ["b"]
+
+    def test_tool_schema_rendered_once(self) -> None:
+        tool = ToolSchema(name="t", description="d", input_schema={"type": "object"})
+
+        assert tool.rendered == {
+            "name": "t", "description": "d", "input_schema": {"type": "object"},
+        }
+        with pytest.raises(AttributeError):
+            tool.name = "other"  # type: ignore[misc]
+
+    def test_system_cache_bounded(self) -> None:
+        client = LLMClient(api_key="test-key")
+        for i in range(20):
+            client._system_payload(f"prompt {i}")
+
+        assert len(client._system_cache) <= 8
+        assert client._system_payload("prompt 19") is client._system_payload("prompt 19")
+
+
+class TestNoEventBus:
+    async def test_collect_text_only_accumulates(self) -> None:
+        client = LLMClient(api_key="test-key")
+        response = LLMResponse()
+        state = _StreamState()
+
+        for event in [_text("a"), SimpleNamespace(type="ping"), _text("b")]:
+            await client._collect_text(event, response, state)
+
+        assert state.text == ["a", "b"]
+        assert state.parts == []
+
+
+class TestSharedHttpClient:
+    async def test_shared_client_survives_llm_close(self) -> None:
+        http_client = build_shared_http_client()
+        try:
+            assert build_shared_http_client() is http_client
+            client = LLMClient(api_key="test-key", http_client=http_client)
+
+            await client.close()
+
+            assert not http_client.is_closed
+        finally:
+            await close_shared_http_client()
+        assert http_client.is_closed
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import sys
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -9,7 +11,10 @@ import pytest
 from comfyui_agent.domain.tools.management import (
     DownloadModelTool,
     InstallCustomNodeTool,
+    _communicate,
+    _decode_tail,
     _extract_filename_from_url,
+    _find_comfyui_python,
 )
 
 
@@ -38,6 +43,7 @@ def mock_client_no_manager() -> AsyncMock:
     """Create a mock ComfyUIPort without Manager."""
     client = AsyncMock()
     client.manager_available = AsyncMock(return_value=False)
+    client.invalidate_caches = MagicMock()
     client.get_folder_paths = AsyncMock(
         return_value={
             "checkpoints": [["/models/checkpoints"]],
@@ -209,6 +215,7 @@ class TestInstallCustomNodeTool:
                 })
                 # Should attempt git clone
                 mock_exec.assert_called_once()
+                mock_client_no_manager.invalidate_caches.assert_called_once()
                 args = mock_exec.call_args[0]
                 assert args[0] == "git"
                 assert args[1] == "clone"
@@ -234,6 +241,39 @@ class TestInstallCustomNodeTool:
 # ============================================================
 
 
+class TestCommunicate:
+    async def test_timeout_terminates_child(self) -> None:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", "import time; time.sleep(30)",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await _communicate(proc, timeout=0.2)
+        assert proc.returncode is not None
+
+    async def test_returns_output(self) -> None:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", "print('hi')",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await _communicate(proc, timeout=10)
+        assert stdout.strip() == b"hi"
+        assert proc.returncode == 0
+
+
+class TestDecodeTail:
+    def test_keeps_only_tail(self) -> None:
+        data = b"x" * 10_000 + b"ERROR: boom"
+        text = _decode_tail(data)
+        assert len(text) == 2000
+        assert text.endswith("ERROR: boom")
+
+    def test_handles_empty_and_invalid_bytes(self) -> None:
+        assert _decode_tail(None) == ""
+        assert _decode_tail(b"\xff ok") == "\ufffd ok"
+
+
+
 class TestExtractFilename:
     def test_huggingface_resolve_url(self) -> None:
         url = "https://huggingface.co/user/repo/resolve/main/model.safetensors"
@@ -258,3 +298,18 @@ class TestExtractFilename:
     def test_no_extension_returns_empty(self) -> None:
         url = "https://example.com/noext"
         assert _extract_filename_from_url(url) == ""
+
+
+class TestFindComfyUIPython:
+    def test_venv_created_later_is_found(self, tmp_path, monkeypatch) -> None:
+        monkeypatch.setattr("comfyui_agent.domain.tools.management._venv_python", {})
+        custom_nodes = tmp_path / "custom_nodes"
+        assert _find_comfyui_python(custom_nodes) == "python3"
+
+        python = tmp_path / "venv" / "bin" / "python"
+        python.parent.mkdir(parents=True)
+        python.touch()
+
+        assert _find_comfyui_python(custom_nodes) == str(python)
+        python.unlink()
+        assert _find_comfyui_python(custom_nodes) == str(python)  # hit is cached
@@ -177,12 +177,13 @@ class TestNodeIndexBasic:
         assert not idx.is_built
         assert idx.node_count == 0
         assert idx.categories == []
+        assert idx.category_count == 0
         assert "not built" in idx.search("test")
 
     def test_built_state(self, node_index: NodeIndex):
         assert node_index.is_built
         assert node_index.node_count == 8
-        assert len(node_index.categories) > 0
+        assert node_index.category_count == len(node_index.categories) > 0
 
     def test_categories(self, node_index: NodeIndex):
         cats = node_index.categories
@@ -57,6 +57,10 @@ def test_detect_unknown_defaults_to_knowledge() -> None:
     assert _detect_identity_type("something.identity.feature") == IdentityType.KNOWLEDGE
 
 
+def test_detect_prefixed_persona_is_not_persona() -> None:
+    assert _detect_identity_type("old.persona.identity.feature") == IdentityType.KNOWLEDGE
+
+
 # ---------------------------------------------------------------
 # _extract_feature_name
 # ---------------------------------------------------------------
@@ -119,6 +123,18 @@ def test_load_identity(rolex_dir: Path) -> None:
     assert types == {IdentityType.PERSONA, IdentityType.KNOWLEDGE, IdentityType.EXPERIENCE}
 
 
+async def test_load_identity_async_matches_sync(rolex_dir: Path) -> None:
+    features = await RolexIdentityLoader(rolex_dir=str(rolex_dir)).load_identity_async(
+        "test-role"
+    )
+    expected = RolexIdentityLoader(rolex_dir=str(rolex_dir)).load_identity("test-role")
+
+    assert features == expected
+    assert await RolexIdentityLoader(rolex_dir=str(rolex_dir)).load_identity_async(
+        "nonexistent"
+    ) == []
+
+
 def test_load_identity_missing_role(rolex_dir: Path) -> None:
     loader = RolexIdentityLoader(rolex_dir=str(rolex_dir))
     features = loader.load_identity("nonexistent")
@@ -143,6 +159,17 @@ def test_save_experience_creates_dir() -> None:
         assert saved.exists()
 
 
+def test_load_identity_reuses_parse_until_dir_changes(rolex_dir: Path) -> None:
+    loader = RolexIdentityLoader(rolex_dir=str(rolex_dir))
+    first = loader.load_identity("test-role")
+    second = loader.load_identity("test-role")
+    assert [id(f) for f in second] == [id(f) for f in first]
+
+    loader.save_experience("test-role", "new-exp", "Feature: New Experience\n")
+    names = {f.name for f in loader.load_identity("test-role")}
+    assert "New Experience" in names
+
+
 # ---------------------------------------------------------------
 # features_to_sections
 # ---------------------------------------------------------------
@@ -444,6 +471,9 @@ class TestRegistrySearchTool:
         assert "1200" in result.text
         assert "4.5.0" in result.text
         assert "segmentation" in result.text
+        fields = web.search_registry.call_args.kwargs["fields"]
+        assert "latest_version" in fields
+        assert "tags" in fields
 
     @pytest.mark.asyncio
     async def test_run_not_found(self) -> None:
@@ -83,8 +83,56 @@ class TestSessionStore:
         assert isinstance(loaded[1]["content"], list)
         assert loaded[1]["content"][0]["type"] == "text"
 
+    @pytest.mark.asyncio
+    async def test_plain_text_that_looks_like_json_scalar(self, store: SessionStore):
+        sid = await store.create_session("Numbers")
+        await store.save_messages(sid, [
+            {"role": "user", "content": "42"},
+            {"role": "user", "content": "[draft] notes"},
+        ])
+        loaded = await store.load_messages(sid)
+        assert [m["content"] for m in loaded] == ["42", "[draft] notes"]
+
+    @pytest.mark.asyncio
+    async def test_structured_content_stored_as_blob(self, store: SessionStore):
+        sid = await store.create_session("Blobs")
+        await store.save_messages(sid, [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": [{"type": "text", "text": "Hi"}]},
+        ])
+        db = await store._get_db()
+        cursor = await db.execute(
+            "SELECT typeof(content) FROM messages WHERE session_id = ? ORDER BY id", (sid,)
+        )
+        assert [row[0] for row in await cursor.fetchall()] == ["text", "blob"]
+
+        # Rows from before the switch keep their JSON in a TEXT value
+        await db.execute(
+            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, 0)",
+            (sid, "user", '[{"type": "text", "text": "old"}]'),
+        )
+        await db.commit()
+        loaded = await store.load_messages(sid)
+        assert [m["content"] for m in loaded] == [
+            "Hello",
+            [{"type": "text", "text": "Hi"}],
+            [{"type": "text", "text": "old"}],
+        ]
+
     @pytest.mark.asyncio
     async def test_empty_session_messages(self, store: SessionStore):
         sid = await store.create_session("Empty")
         loaded = await store.load_messages(sid)
         assert loaded == []
+
+    @pytest.mark.asyncio
+    async def test_connection_pragmas(self, store: SessionStore):
+        db = await store._get_db()
+        for pragma, expected in [
+            ("journal_mode", "wal"),
+            ("synchronous", 1),  # NORMAL
+            ("temp_store", 2),  # MEMORY
+            ("busy_timeout", 5000),
+        ]:
+            cursor = await db.execute(f"PRAGMA {pragma}")
+            assert (await cursor.fetchone())[0] == expected
@@ -2,9 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
-from comfyui_agent.infrastructure.persistence.session_store import SessionStore
+from comfyui_agent.infrastructure.persistence.session_store import (
+    _SELECT_MESSAGES,
+    _SELECT_MESSAGES_FROM,
+    _SELECT_ROOT_SESSIONS,
+    SessionStore,
+)
 
 
 @pytest.fixture
@@ -50,6 +57,92 @@ class TestAppendMessage:
         assert len(messages) == 1
         assert messages[0]["content"] == content
 
+    @pytest.mark.asyncio
+    async def test_append_touches_session(self, store):
+        session_id = await store.create_session("test")
+        before = (await store.get_session_meta(session_id))["updated_at"]
+
+        await store.append_message(session_id, "user", "hello")
+
+        assert (await store.get_session_meta(session_id))["updated_at"] > before
+
+    @pytest.mark.asyncio
+    async def test_save_messages_touches_session_once(self, store):
+        session_id = await store.create_session("test")
+        before = (await store.get_session_meta(session_id))["updated_at"]
+        db = await store._get_db()
+        changes = db.total_changes
+
+        await store.save_messages(
+            session_id, [{"role": "user", "content": str(i)} for i in range(5)]
+        )
+
+        # total_changes includes rows written by triggers: 5 INSERTs + 1 UPDATE
+        assert db.total_changes - changes == 6
+        assert (await store.get_session_meta(session_id))["updated_at"] > before
+
+    @pytest.mark.asyncio
+    async def test_migration_drops_touch_trigger(self, store):
+        db = await store._get_db()
+        await db.execute(
+            "CREATE TRIGGER messages_touch_session AFTER INSERT ON messages "
+            "BEGIN UPDATE sessions SET updated_at = NEW.created_at "
+            "WHERE id = NEW.session_id; END"
+        )
+        await db.execute("PRAGMA user_version = 4")
+        await db.commit()
+
+        reopened = SessionStore(db_path=store.db_path)
+        try:
+            db = await reopened._get_db()
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'"
+            )
+            assert (await cursor.fetchone())[0] == 0
+        finally:
+            await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_ordinals_continue_across_stores(self, store):
+        session_id = await store.create_session("test")
+        await store.save_messages(session_id, [{"role": "user", "content": "a"}])
+        await store.append_message(session_id, "assistant", "b")
+
+        reopened = SessionStore(db_path=store.db_path)
+        try:
+            await reopened.append_message(session_id, "user", "c")
+            db = await reopened._get_db()
+            cursor = await db.execute(
+                "SELECT ordinal FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            )
+            assert [row[0] for row in await cursor.fetchall()] == [0, 1, 2]
+        finally:
+            await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_appends_share_a_commit(self, store, monkeypatch):
+        session_id = await store.create_session("test")
+        await store.append_message(session_id, "user", "warm-up")
+        db = await store._get_db()
+        commits = 0
+        real_commit = db.commit
+
+        async def counting_commit():
+            nonlocal commits
+            commits += 1
+            await real_commit()
+
+        monkeypatch.setattr(db, "commit", counting_commit)
+        ids = await asyncio.gather(*(
+            store.append_message(session_id, "user", f"m{i}") for i in range(10)
+        ))
+
+        assert ids == sorted(set(ids))
+        assert commits < 10
+        messages = await store.load_messages(session_id)
+        assert [m["content"] for m in messages[1:]] == [f"m{i}" for i in range(10)]
+
 
 class TestLoadMessagesFrom:
     @pytest.mark.asyncio
@@ -74,6 +167,20 @@ class TestLoadMessagesFrom:
         assert messages[1]["content"] == "new"
 
 
+class TestLastMessageId:
+    @pytest.mark.asyncio
+    async def test_tracks_history_changes(self, store):
+        session_id = await store.create_session("test")
+        assert await store.last_message_id(session_id) is None
+
+        first = await store.append_message(session_id, "user", "hello")
+        assert await store.last_message_id(session_id) == first
+
+        # Replacing the history yields new IDs even for the same length
+        await store.save_messages(session_id, [{"role": "user", "content": "hi"}])
+        assert await store.last_message_id(session_id) > first
+
+
 class TestSessionMeta:
     @pytest.mark.asyncio
     async def test_get_session_meta(self, store):
@@ -131,6 +238,41 @@ class TestChildSession:
         assert sessions[0]["id"] == parent_id
 
 
+class TestReaderPool:
+    @pytest.mark.asyncio
+    async def test_reads_use_read_only_connections(self, store):
+        session_id = await store.create_session("test")
+        await store.append_message(session_id, "user", "hello")
+
+        assert (await store.load_messages(session_id))[0]["content"] == "hello"
+        reader = await store._get_reader()
+        assert reader is not await store._get_db()
+        with pytest.raises(Exception, match="readonly"):
+            await reader.execute("DELETE FROM messages")
+
+
+class TestQueryPlans:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sql, params", [
+        (_SELECT_MESSAGES, ("s",)),
+        (_SELECT_MESSAGES_FROM, ("s", 1)),
+    ])
+    async def test_message_loads_use_session_index(self, store, sql, params):
+        db = await store._get_db()
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = " ".join(row[3] for row in await cursor.fetchall())
+        assert "USING INDEX idx_messages_session" in plan
+        assert "TEMP B-TREE" not in plan  # ORDER BY id served by the index
+
+    @pytest.mark.asyncio
+    async def test_list_sessions_uses_parent_index(self, store):
+        db = await store._get_db()
+        cursor = await db.execute(f"EXPLAIN QUERY PLAN {_SELECT_ROOT_SESSIONS}")
+        plan = " ".join(row[3] for row in await cursor.fetchall())
+        assert "USING INDEX idx_sessions_parent_updated" in plan
+        assert "TEMP B-TREE" not in plan
+
+
 class TestMigration:
     @pytest.mark.asyncio
     async def test_migration_idempotent(self, store):
@@ -94,3 +94,55 @@ class TestSubAgentExecution:
         assert not result.is_error
         assert "KSampler" in result.text
         session_store.create_child_session.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_emits_start_without_child_session_id(self):
+        session_store = AsyncMock()
+        session_store.create_child_session = AsyncMock(return_value="child-123")
+        session_store.get_session_meta = AsyncMock(return_value={})
+        session_store.load_messages_from = AsyncMock(return_value=[])
+        session_store.append_message = AsyncMock(return_value=1)
+
+        event_bus = AsyncMock()
+        event_bus.emit = AsyncMock()
+
+        llm = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.text = "done"
+        mock_response.tool_calls = []
+        mock_response.has_tool_calls.return_value = False
+        mock_response.usage = {"input_tokens": 1, "output_tokens": 1}
+        llm.chat = AsyncMock(return_value=mock_response)
+
+        tool = SubAgentTool(
+            llm=llm,
+            session_store=session_store,
+            event_bus=event_bus,
+            read_only_tools=[FakeReadOnlyTool()],
+        )
+        await tool.run({"task": "look around"})
+
+        start = event_bus.emit.call_args_list[0].args[0]
+        assert start.type.value == "subagent.start"
+        assert start.data == {"task": "look around"}
+
+    @pytest.mark.asyncio
+    async def test_failed_child_session_pairs_start_with_end(self):
+        session_store = AsyncMock()
+        session_store.create_child_session = AsyncMock(side_effect=RuntimeError("db locked"))
+
+        event_bus = AsyncMock()
+        event_bus.emit = AsyncMock()
+
+        tool = SubAgentTool(
+            llm=AsyncMock(),
+            session_store=session_store,
+            event_bus=event_bus,
+            read_only_tools=[FakeReadOnlyTool()],
+        )
+        result = await tool.run({"task": "look around"})
+
+        assert result.is_error
+        assert "db locked" in result.text
+        types = [c.args[0].type.value for c in event_bus.emit.call_args_list]
+        assert types == ["subagent.start", "subagent.end"]
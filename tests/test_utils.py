@@ -82,6 +82,16 @@ server:
         config = AppConfig.from_yaml("/nonexistent/path.yaml")
         assert config.comfyui.base_url == "http://127.0.0.1:6006"
 
+    def test_from_yaml_rereads_after_edit(self, tmp_path):
+        path = tmp_path / "config.yaml"
+        path.write_text("server:\n  port: 3000\n")
+        first = AppConfig.from_yaml(path)
+        assert AppConfig.from_yaml(path) is not first
+
+        path.write_text("server:\n  port: 4000\n")
+        os.utime(path, ns=(0, 0))
+        assert AppConfig.from_yaml(path).server.port == 4000
+
     def test_resolve_api_key_from_env(self):
         config = AppConfig()
         os.environ["ANTHROPIC_API_KEY"] = "test-key-123"
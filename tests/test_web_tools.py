@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+
 import pytest
+from aiohttp import test_utils, web
 from unittest.mock import AsyncMock
 
+from comfyui_agent.domain.tools.base import MAX_TOOL_OUTPUT, TTLCache
 from comfyui_agent.domain.tools.web_fetch import WebFetchTool
 from comfyui_agent.domain.tools.web_search import WebSearchTool
 from comfyui_agent.infrastructure.clients.web_client import (
+    WebClient,
     _extract_text_from_html,
+    _extract_text_from_html_bytes,
     _parse_ddg_html,
+    _parse_ddg_with_regex,
 )
 
 
@@ -99,6 +106,85 @@ class TestWebFetchTool:
         assert result.is_error
         assert "connection refused" in result.text
 
+    async def test_fetch_cached_per_url(
+        self, fetch_tool: WebFetchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.fetch_url.return_value = {
+            "content": "cached body",
+            "content_type": "text/plain",
+            "status_code": 200,
+            "url": "https://example.com",
+        }
+        first = await fetch_tool.run({"url": "https://example.com"})
+        second = await fetch_tool.run({"url": "https://example.com"})
+        assert second.text == first.text
+        mock_web.fetch_url.assert_called_once()
+
+    async def test_fetch_revalidates_with_etag(
+        self, fetch_tool: WebFetchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.fetch_url.return_value = {
+            "content": "v1 body",
+            "content_type": "text/plain",
+            "status_code": 200,
+            "url": "https://example.com",
+            "etag": '"abc"',
+            "cache_control": "max-age=0",
+        }
+        first = await fetch_tool.run({"url": "https://example.com"})
+
+        mock_web.fetch_url.return_value = {
+            "content": "",
+            "content_type": "",
+            "status_code": 304,
+            "url": "https://example.com",
+        }
+        second = await fetch_tool.run({"url": "https://example.com"})
+
+        assert second.text == first.text
+        assert "v1 body" in second.text
+        assert mock_web.fetch_url.call_args.kwargs["extra_headers"] == {
+            "If-None-Match": '"abc"',
+        }
+
+    async def test_fetch_no_store_not_cached(
+        self, fetch_tool: WebFetchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.fetch_url.return_value = {
+            "content": "private",
+            "content_type": "text/plain",
+            "status_code": 200,
+            "url": "https://example.com",
+            "etag": '"abc"',
+            "cache_control": "no-store",
+        }
+        await fetch_tool.run({"url": "https://example.com"})
+        await fetch_tool.run({"url": "https://example.com"})
+        assert mock_web.fetch_url.call_count == 2
+        assert "extra_headers" not in mock_web.fetch_url.call_args.kwargs
+
+    async def test_fetch_errors_not_cached(
+        self, fetch_tool: WebFetchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.fetch_url.side_effect = RuntimeError("boom")
+        await fetch_tool.run({"url": "https://example.com"})
+        await fetch_tool.run({"url": "https://example.com"})
+        assert mock_web.fetch_url.call_count == 2
+
+    async def test_fetch_large_body_truncated_with_header(
+        self, fetch_tool: WebFetchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.fetch_url.return_value = {
+            "content": "x\n" * 50_000,
+            "content_type": "text/plain",
+            "status_code": 200,
+            "url": "https://example.com",
+        }
+        result = await fetch_tool.run({"url": "https://example.com"})
+        assert result.text.startswith("URL: https://example.com\nContent-Type: text/plain")
+        assert "lines truncated" in result.text
+        assert len(result.text) <= MAX_TOOL_OUTPUT + 100
+
 
 # ---------------------------------------------------------------------------
 # WebSearchTool tests
@@ -152,6 +238,35 @@ class TestWebSearchTool:
         assert result.is_error
         assert "API error" in result.text
 
+    async def test_search_cached_per_query(
+        self, search_tool: WebSearchTool, mock_web: AsyncMock
+    ) -> None:
+        mock_web.search.return_value = [
+            {"title": "Result 1", "url": "https://a.com", "snippet": "First"},
+        ]
+        await search_tool.run({"query": "comfyui"})
+        await search_tool.run({"query": "comfyui"})
+        await search_tool.run({"query": "comfyui", "max_results": 3})
+        assert mock_web.search.call_count == 2
+
+
+class TestTTLCache:
+    def test_expired_entry_is_dropped(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(ttl=0.0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: TTLCache[str, int] = TTLCache(ttl=60.0, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # refresh "a"
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
 
 # ---------------------------------------------------------------------------
 # HTML extraction tests
@@ -182,6 +297,11 @@ class TestHTMLExtraction:
         text = _extract_text_from_html(html)
         assert "A & B < C" in text
 
+    def test_extract_text_from_bytes(self) -> None:
+        raw = "<p>Caf\u00e9 &amp; bar</p><script>x()</script>".encode()
+        text = _extract_text_from_html_bytes(raw)
+        assert text == "Caf\u00e9 & bar"
+
 
 class TestDDGParsing:
     def test_parse_ddg_empty(self) -> None:
@@ -201,6 +321,91 @@ class TestDDGParsing:
         assert results[0]["title"] == "Title 0"
         assert results[2]["url"] == "https://example.com/2"
 
+    def test_regex_fallback_titles_without_snippets(self) -> None:
+        # Used to rescan to the end of the page from every title (quadratic)
+        page = '<a class="result__a" href="https://x.dev">t</a>' * 3000
+        assert _parse_ddg_with_regex(page, 5) == []
+
+    def test_parse_ddg_nested_markup(self) -> None:
+        page = (
+            '<div class="result"><h2><a class="result__a" href="https://a.dev">'
+            'Alpha <b>node</b> &amp; co</a></h2>'
+            '<a class="result__snippet" href="https://a.dev">Fast <b>sampler</b></a></div>'
+        )
+        assert _parse_ddg_html(page, 5) == [
+            {"title": "Alpha node & co", "url": "https://a.dev", "snippet": "Fast sampler"},
+        ]
+
+    def test_regex_fallback_keeps_escaped_markup(self) -> None:
+        page = (
+            '<a class="result__a" href="https://a.dev">Use &lt;b&gt; tags</a>'
+            '<div class="result__snippet">x</div>'
+        )
+        assert _parse_ddg_with_regex(page, 5)[0]["title"] == "Use <b> tags"
+
+
+class TestWebClientCaching:
+    async def test_concurrent_identical_searches_coalesced(self) -> None:
+        client = WebClient()
+        calls = 0
+
+        async def fake_ddg(query: str, max_results: int) -> list[dict]:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [{"title": query}]
+
+        client._search_ddg = fake_ddg  # type: ignore[method-assign]
+        first, second = await asyncio.gather(
+            client.search("flux"), client.search("flux"),
+        )
+        assert first == second == [{"title": "flux"}]
+        assert calls == 1
+        assert client._inflight == {}
+
+    async def test_registry_caches_misses_but_not_failures(self) -> None:
+        client = WebClient()
+        responses = [(None, 60.0), (None, 0), (None, 0)]
+        calls: list[str] = []
+
+        async def fake_fetch(node_id: str, fields: tuple[str, ...]) -> tuple:
+            calls.append(node_id)
+            return responses.pop(0) if node_id == "gone" else (None, 0)
+
+        client._fetch_registry = fake_fetch  # type: ignore[method-assign]
+        assert await client.search_registry("gone") is None
+        assert await client.search_registry("gone") is None
+        await client.search_registry("flaky")
+        await client.search_registry("flaky")
+        assert calls == ["gone", "flaky", "flaky"]
+
+
+class TestFetchURL:
+    async def test_text_decoded_across_chunk_boundaries(self) -> None:
+        body = "Ümlaut ✓ ".encode() * 10
+
+        async def handle(request: web.Request) -> web.StreamResponse:
+            resp = web.StreamResponse(headers={"Content-Type": "text/plain"})
+            await resp.prepare(request)
+            for i in range(0, len(body), 7):  # splits multibyte characters
+                await resp.write(body[i:i + 7])
+            await resp.write_eof()
+            return resp
+
+        app = web.Application()
+        app.router.add_get("/", handle)
+        server = test_utils.TestServer(app)
+        await server.start_server()
+        client = WebClient()
+        try:
+            result = await client.fetch_url(str(server.make_url("/")))
+        finally:
+            await client.close()
+            await server.close()
+
+        assert result["content"] == body.decode()
+        assert result["content_type"] == "text/plain"
+
 
 # ---------------------------------------------------------------------------
 # Factory integration test